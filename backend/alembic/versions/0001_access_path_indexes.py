@@ -0,0 +1,53 @@
+"""Indexes for the catalog and result-read access paths
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_names(table: str) -> set:
+    # Databases created by Base.metadata.create_all already have the new
+    # indexes, so each step only runs when it is still needed. Offline (--sql)
+    # runs cannot inspect and emit every statement.
+    if context.is_offline_mode():
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    perfume_indexes = _index_names("perfumes")
+    if "ix_perfumes_active_gender" not in perfume_indexes:
+        op.create_index("ix_perfumes_active_gender", "perfumes", ["is_active", "gender"])
+    # Covered by the leading column of ix_perfumes_active_gender
+    if "ix_perfumes_is_active" in perfume_indexes:
+        op.drop_index("ix_perfumes_is_active", table_name="perfumes")
+
+    if "ix_affinity_results_profile_score" not in _index_names("affinity_results"):
+        op.create_index(
+            "ix_affinity_results_profile_score",
+            "affinity_results",
+            ["profile_id", sa.text("affinity_score DESC")]
+        )
+
+    if "ix_olfactory_profiles_test_result_id" not in _index_names("olfactory_profiles"):
+        op.create_index("ix_olfactory_profiles_test_result_id", "olfactory_profiles", ["test_result_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_olfactory_profiles_test_result_id", table_name="olfactory_profiles")
+    op.drop_index("ix_affinity_results_profile_score", table_name="affinity_results")
+    op.create_index("ix_perfumes_is_active", "perfumes", ["is_active"])
+    op.drop_index("ix_perfumes_active_gender", table_name="perfumes")
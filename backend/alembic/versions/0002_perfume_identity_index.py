@@ -0,0 +1,30 @@
+"""Index perfumes by (name, brand) for catalog ingestion
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Skip the index if create_all already built it; offline (--sql) runs emit it
+    if not context.is_offline_mode():
+        if "ix_perfumes_name_brand" in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("perfumes")}:
+            return
+    op.create_index("ix_perfumes_name_brand", "perfumes", ["name", "brand"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_perfumes_name_brand", table_name="perfumes")
@@ -0,0 +1,44 @@
+"""Content hashes and change sets for incremental catalog sync
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Skip what create_all already built; offline (--sql) runs emit everything
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    if inspector is None or "content_hash" not in {column["name"] for column in inspector.get_columns("perfumes")}:
+        op.add_column("perfumes", sa.Column("content_hash", sa.String(length=32), nullable=True))
+
+    if inspector is None or not inspector.has_table("catalog_changes"):
+        op.create_table(
+            "catalog_changes",
+            sa.Column("version", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("inserted", sa.JSON(), nullable=True),
+            sa.Column("updated", sa.JSON(), nullable=True),
+            sa.Column("deactivated", sa.JSON(), nullable=True),
+            sa.Column("fingerprint_before", sa.JSON(), nullable=True),
+            sa.Column("fingerprint_after", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_changes")
+    with op.batch_alter_table("perfumes") as batch_op:
+        batch_op.drop_column("content_hash")
@@ -0,0 +1,48 @@
+"""Compact affinity rankings table, and the perfumes gender index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Skip what create_all already built; offline (--sql) runs emit everything
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    # Declared by the model (gender index=True) but older databases lack it
+    if inspector is None or "ix_perfumes_gender" not in {index["name"] for index in inspector.get_indexes("perfumes")}:
+        op.create_index("ix_perfumes_gender", "perfumes", ["gender"])
+
+    if inspector is not None and inspector.has_table("affinity_rankings"):
+        return
+
+    op.create_table(
+        "affinity_rankings",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column(
+            "profile_id",
+            sa.String(length=36),
+            sa.ForeignKey("olfactory_profiles.id", ondelete="CASCADE"),
+            unique=True
+        ),
+        sa.Column("ranking", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("affinity_rankings")
+    op.drop_index("ix_perfumes_gender", table_name="perfumes")
@@ -0,0 +1,35 @@
+"""Catalog version counter bumped by every catalog write
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Skip what create_all already built; offline (--sql) runs emit everything
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("catalog_version"):
+        return
+
+    catalog_version = op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False)
+    )
+    op.bulk_insert(catalog_version, [{"id": 1, "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_version")
@@ -0,0 +1,49 @@
+"""Break score ties by perfume id in the result-read index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_columns() -> list:
+    # Offline (--sql) runs cannot inspect and emit every statement
+    if context.is_offline_mode():
+        return []
+    for index in sa.inspect(op.get_bind()).get_indexes("affinity_results"):
+        if index["name"] == "ix_affinity_results_profile_score":
+            return index["column_names"]
+    return []
+
+
+def upgrade() -> None:
+    # Databases created by Base.metadata.create_all already have the new index
+    if "perfume_id" in _index_columns():
+        return
+    op.drop_index("ix_affinity_results_profile_score", table_name="affinity_results")
+    op.create_index(
+        "ix_affinity_results_profile_score",
+        "affinity_results",
+        ["profile_id", sa.text("affinity_score DESC"), "perfume_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_affinity_results_profile_score", table_name="affinity_results")
+    op.create_index(
+        "ix_affinity_results_profile_score",
+        "affinity_results",
+        ["profile_id", sa.text("affinity_score DESC")]
+    )
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -8,6 +8,21 @@ class Settings(BaseSettings):
     # Database - SQLite for easy setup
     DATABASE_URL: str = "sqlite:///./neuroscent.db"
     
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    
+    # SQLite production profile: pragmas set on every connection, plus
+    # separate read-only connections for GET endpoints
+    SQLITE_PRODUCTION_PROFILE: bool = False
+    SQLITE_JOURNAL_MODE: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"] = "WAL"
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # negative = KiB, positive = pages
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_READ_ONLY_SESSIONS: bool = True
+    
     # API
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "NeuroScent API"
@@ -18,6 +33,70 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Catalog cache: seconds between freshness checks (0 = check every request)
+    CATALOG_CACHE_CHECK_SECONDS: float = 0.0
+    
+    # Preload the catalog and warm the scoring path on startup; /health/ready
+    # reports ready only once this has completed
+    WARMUP_ENABLED: bool = True
+    
+    # Per-stage timings of /test/calculate: Server-Timing header and latency
+    # histograms (GET /health/timings). False skips all timer calls.
+    STAGE_TIMING_ENABLED: bool = True
+    
+    # Prometheus /metrics endpoint plus the request and SQL instrumentation
+    # feeding it
+    METRICS_ENABLED: bool = True
+    
+    # Per-request SQL report: X-DB-Query-Count / X-DB-Query-Time-Ms headers and
+    # a logged warning for every statement shape run QUERY_REPEAT_THRESHOLD or
+    # more times in one request (N+1 suspects)
+    QUERY_TRACKING_ENABLED: bool = False
+    QUERY_REPEAT_THRESHOLD: int = 5
+    
+    # On-demand cProfile of /test/calculate: requests sending PROFILING_HEADER
+    # set to PROFILING_TOKEN are profiled, at most one every
+    # PROFILING_MIN_INTERVAL_SECONDS. The newest PROFILING_MAX_PROFILES are
+    # kept in memory and served under /admin/profiles (same header required).
+    # Without a token, nothing is profiled and /admin/profiles answers 403.
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_MIN_INTERVAL_SECONDS: float = 60.0
+    PROFILING_MAX_PROFILES: int = 20
+    
+    # Directory for memory-mapped catalog snapshots shared by all workers
+    # (None = every worker keeps its own in-memory catalog)
+    CATALOG_SNAPSHOT_DIR: Optional[str] = None
+    
+    # Upper bound for the top_k recommendations a client can request
+    TOP_K_MAX: int = 50
+    
+    # Affinity persistence: "bulk" (every scored perfume), "top_k" (best
+    # AFFINITY_PERSIST_TOP_K rows) or "compact" (one ranked list per profile)
+    AFFINITY_PERSISTENCE_MODE: Literal["bulk", "top_k", "compact"] = "bulk"
+    AFFINITY_PERSIST_TOP_K: int = 3
+    
+    # Precomputed ranking table (.npz from build_ranking_table.py). Used only
+    # in "top_k" persistence mode, since other modes need every score.
+    RANKING_TABLE_PATH: Optional[str] = None
+    
+    # Ranking memoization per canonical profile key and catalog
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_TTL_SECONDS: float = 300.0
+    
+    # GET /test/{test_id} responses: in-process cache and client max-age
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 4096
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    TEST_RESULT_MAX_AGE_SECONDS: int = 86400
+    
+    # Worker pool for blocking DB work and scoring
+    WORKER_POOL_SIZE: int = 8
+    WORKER_QUEUE_DEPTH: int = 64
+    
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
     
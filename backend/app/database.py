@@ -1,20 +1,97 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
 
+# Async drivers select the asyncio engine, e.g. sqlite+aiosqlite:///./neuroscent.db
+ASYNC_DRIVERS = {"aiosqlite", "asyncpg", "aiomysql", "asyncmy"}
+
+database_url = make_url(settings.DATABASE_URL)
+ASYNC_DATABASE = database_url.get_driver_name() in ASYNC_DRIVERS
+IS_SQLITE = database_url.get_backend_name() == "sqlite"
+
 # Create database engine
 # SQLite needs connect_args for thread safety
 connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    connect_args=connect_args
-)
+# In-memory SQLite uses a single-connection pool that takes no sizing
+engine_args = {"echo": settings.DEBUG, "connect_args": connect_args}
+pool_args = {}
+if database_url.database not in (None, "", ":memory:"):
+    pool_args.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT
+    )
+
+# Separate read-only connections for GET endpoints under the SQLite profile
+READ_ONLY_SESSIONS = IS_SQLITE and settings.SQLITE_PRODUCTION_PROFILE and settings.SQLITE_READ_ONLY_SESSIONS
+
+
+def _apply_sqlite_profile(sync_engine, read_only=False):
+    """Set the production pragmas on every new SQLite connection"""
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _create_sync_engine(read_only=False):
+    # The sync engine always exists: scripts and create_all use it. In async
+    # mode it points at the same database through the default sync driver.
+    sync_engine = create_engine(
+        database_url.set(drivername=database_url.get_backend_name()) if ASYNC_DATABASE else database_url,
+        **engine_args,
+        **({"poolclass": QueuePool, **pool_args} if pool_args else {})
+    )
+    if IS_SQLITE and settings.SQLITE_PRODUCTION_PROFILE:
+        _apply_sqlite_profile(sync_engine, read_only)
+    return sync_engine
+
+
+def _create_async_engine(read_only=False):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # aiosqlite defaults to NullPool, so the queue pool is requested explicitly
+    new_engine = create_async_engine(
+        database_url,
+        **engine_args,
+        **({"poolclass": AsyncAdaptedQueuePool, **pool_args} if pool_args else {})
+    )
+    if IS_SQLITE and settings.SQLITE_PRODUCTION_PROFILE:
+        _apply_sqlite_profile(new_engine.sync_engine, read_only)
+    return new_engine
+
+
+engine = _create_sync_engine()
+read_engine = _create_sync_engine(read_only=True) if READ_ONLY_SESSIONS else engine
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+if ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = _create_async_engine()
+    async_read_engine = _create_async_engine(read_only=True) if READ_ONLY_SESSIONS else async_engine
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=True)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=True)
 
 # Create base class for models
 Base = declarative_base()
@@ -27,3 +104,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency for getting a read-only database session"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Dependency for getting a read-only async database session"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+# Routers depend on get_session / get_read_session; DATABASE_URL decides
+# whether they are sync or async
+get_session = get_async_db if ASYNC_DATABASE else get_db
+get_read_session = get_async_read_db if ASYNC_DATABASE else get_read_db
@@ -1,17 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.config import settings
-from app.routers import test_router, perfume_router, health_router
-from app.database import engine, Base
+from app.database import async_engine, async_read_engine
+from app.routers import test_router, perfume_router, health_router, metrics_router, admin_router
+from app.services import query_tracker
+from app.services.metrics import MetricsMiddleware
+from app.services.query_tracker import QueryTrackingMiddleware
+from app.services.warmup import warmup
+from app.services.worker_pool import WorkerPoolSaturated, worker_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Check the schema once, warm up in the background, then drain the worker
+    pool and close pooled async connections on shutdown.
+    
+    Warm-up runs in a thread so liveness checks answer right away;
+    GET /health/ready reports ready once it completes.
+    """
+    warmup.check_schema()
+    task = None
+    if settings.WARMUP_ENABLED:
+        task = asyncio.create_task(asyncio.to_thread(warmup.run))
+    else:
+        warmup.skip()
+    
+    yield
+    
+    if task is not None:
+        await task
+    # Let in-flight jobs finish before the process exits
+    worker_pool.shutdown()
+    # aiosqlite runs each connection in a non-daemon thread; pooled
+    # connections would otherwise keep the process alive
+    for pooled_engine in {async_engine, async_read_engine} - {None}:
+        await pooled_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -23,10 +58,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SQL statement counts, time and N+1 suspects per request, as response headers
+# and log lines (registered first, so it runs inside the metrics middleware
+# and shares its counter)
+if settings.QUERY_TRACKING_ENABLED:
+    query_tracker.install()
+    app.add_middleware(QueryTrackingMiddleware, repeat_threshold=settings.QUERY_REPEAT_THRESHOLD)
+
+# Request latency, status and SQL usage per route, exposed on /metrics
+if settings.METRICS_ENABLED:
+    query_tracker.install()
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health_router.router, prefix=settings.API_V1_STR, tags=["health"])
 app.include_router(test_router.router, prefix=settings.API_V1_STR, tags=["test"])
 app.include_router(perfume_router.router, prefix=settings.API_V1_STR, tags=["perfumes"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router.router, tags=["metrics"])
+if settings.PROFILING_ENABLED:
+    app.include_router(admin_router.router, prefix=settings.API_V1_STR, tags=["admin"])
+
+
+@app.exception_handler(WorkerPoolSaturated)
+async def worker_pool_saturated_handler(request: Request, exc: WorkerPoolSaturated):
+    """Shed load when the worker pool queue is full"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
 
 
 @app.get("/")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, Float, DateTime, ForeignKey, Boolean, JSON
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Column, String, Text, Float, DateTime, ForeignKey, Boolean, JSON, Index, Integer, event
+from sqlalchemy.sql import func, text
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base
 import uuid
 
@@ -9,6 +9,12 @@ class Perfume(Base):
     """Perfume model for storing perfume information"""
     
     __tablename__ = "perfumes"
+    __table_args__ = (
+        # Active catalog filtered by gender
+        Index("ix_perfumes_active_gender", "is_active", "gender"),
+        # Identity of a perfume for catalog ingestion
+        Index("ix_perfumes_name_brand", "name", "brand"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(255), nullable=False)
@@ -17,7 +23,10 @@ class Perfume(Base):
     image_url = Column(String(500))
     purchase_url = Column(String(500))
     gender = Column(String(20), default="unisex", index=True)  # "male", "female", "unisex"
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
+    # Hash of the source record, set by catalog ingestion; deferred so the
+    # API never selects it
+    content_hash = deferred(Column(String(32)))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     def __repr__(self):
@@ -75,6 +84,11 @@ class AffinityResult(Base):
     """Affinity result model for storing calculated matches"""
     
     __tablename__ = "affinity_results"
+    __table_args__ = (
+        # Best results of a profile:
+        # WHERE profile_id = ? ORDER BY affinity_score DESC, perfume_id
+        Index("ix_affinity_results_profile_score", "profile_id", text("affinity_score DESC"), "perfume_id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     profile_id = Column(String(36), ForeignKey("olfactory_profiles.id", ondelete="CASCADE"))
@@ -90,3 +104,70 @@ class AffinityResult(Base):
     
     def __repr__(self):
         return f"<AffinityResult {self.affinity_score}%>"
+
+
+class AffinityRanking(Base):
+    """Compact ranked affinity list, one row per profile"""
+    
+    __tablename__ = "affinity_rankings"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    profile_id = Column(String(36), ForeignKey("olfactory_profiles.id", ondelete="CASCADE"), unique=True)
+    
+    # [[perfume_id, affinity_score], ...] sorted by score, best first
+    ranking = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationship
+    profile = relationship("OlfactoryProfile", backref="affinity_ranking")
+    
+    def __repr__(self):
+        return f"<AffinityRanking for Profile {self.profile_id}>"
+
+
+class CatalogChange(Base):
+    """Change set written by a catalog sync, numbered by its own version"""
+    
+    __tablename__ = "catalog_changes"
+    
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # Perfume ids touched by the sync
+    inserted = Column(JSON, default=list)
+    updated = Column(JSON, default=list)
+    deactivated = Column(JSON, default=list)
+    
+    # CatalogVersion.version before and after the change set, so caches can
+    # tell whether the change sets explain every write since they were built
+    fingerprint_before = Column(JSON)
+    fingerprint_after = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<CatalogChange v{self.version}>"
+
+
+class CatalogVersion(Base):
+    """
+    Single-row counter of catalog writes.
+    
+    Every write to perfumes or perfume_vectors bumps it in the same
+    transaction (CatalogCache.bump_version), so it moves exactly when the
+    committed catalog does. Writes made outside the app must bump it too.
+    """
+    
+    __tablename__ = "catalog_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<CatalogVersion v{self.version}>"
+
+
+# The counter row exists from the start, so bumping it is a plain UPDATE
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+)
@@ -28,7 +28,7 @@ class OlfactoryProfile(Base):
     __tablename__ = "olfactory_profiles"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    test_result_id = Column(String(36), ForeignKey("test_results.id", ondelete="CASCADE"))
+    test_result_id = Column(String(36), ForeignKey("test_results.id", ondelete="CASCADE"), index=True)
     
     # Numeric vectors (0.0 - 1.0)
     intensity = Column(Float, nullable=False)
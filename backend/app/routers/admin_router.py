@@ -0,0 +1,54 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.services.profiler import request_profiler
+
+
+def require_profiling_access(x_profile: Optional[str] = Header(default=None, alias=settings.PROFILING_HEADER)):
+    """Admin endpoints take the same header (and token) as profiled requests"""
+    if not request_profiler.authorized(x_profile):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling access denied")
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_access)])
+
+
+@router.get("/admin/profiles", status_code=status.HTTP_200_OK)
+async def list_profiles():
+    """Stored request profiles (newest first) and capture counters"""
+    return {
+        "stats": request_profiler.stats(),
+        "profiles": request_profiler.list()
+    }
+
+
+@router.get("/admin/profiles/{profile_id}", status_code=status.HTTP_200_OK)
+async def get_profile(
+    profile_id: str,
+    format: Literal["text", "pstats"] = Query(default="text", description="Text report or raw pstats file"),
+    sort: Literal["cumulative", "tottime", "calls"] = Query(default="cumulative", description="Sort key of the text report"),
+    limit: int = Query(default=50, ge=1, le=1000, description="Functions listed in the text report")
+):
+    """
+    One stored profile.
+    
+    format=pstats downloads the raw data, readable with pstats.Stats(path)
+    or tools such as snakeviz.
+    """
+    if format == "pstats":
+        data = request_profiler.pstats_data(profile_id)
+    else:
+        data = request_profiler.report(profile_id, sort, limit)
+    
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    
+    if format == "pstats":
+        return Response(
+            content=data,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+        )
+    return PlainTextResponse(data)
@@ -1,7 +1,12 @@
 from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.services.stage_timing import stage_histograms
+from app.services.warmup import warmup
+from app.services.worker_pool import worker_pool
+
 
 router = APIRouter()
 
@@ -22,3 +27,24 @@ async def health_check():
         "timestamp": datetime.now(),
         "version": "1.0.0"
     }
+
+
+@router.get("/health/workers", status_code=status.HTTP_200_OK)
+async def worker_pool_stats():
+    """Worker pool saturation: running and queued jobs, rejections and wait time"""
+    return worker_pool.stats()
+
+
+@router.get("/health/timings", status_code=status.HTTP_200_OK)
+async def stage_timing_stats():
+    """Latency per request stage: count, mean and p50 / p95 / p99 histogram bucket bounds"""
+    return stage_histograms.summary()
+
+
+@router.get("/health/ready", status_code=status.HTTP_200_OK)
+async def readiness_check():
+    """Readiness: 200 once startup warm-up has completed, 503 before or if it failed"""
+    state = warmup.state()
+    if state["status"] != "ready":
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=state)
+    return state
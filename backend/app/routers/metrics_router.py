@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from app.services.metrics import metrics
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format 0.0.4)"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
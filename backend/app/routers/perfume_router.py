@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_read_session
 from app.models.perfume import Perfume, PerfumeVector
+from app.services.worker_pool import worker_pool
 
 
 router = APIRouter()
@@ -14,9 +15,14 @@ async def get_all_perfumes(
     skip: int = 0,
     limit: int = 50,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_session)
 ):
     """Get all perfumes with pagination"""
+    return await worker_pool.run_db(db, _get_all_perfumes, skip, limit, active_only)
+
+
+def _get_all_perfumes(skip: int, limit: int, active_only: bool, db: Session):
+    """Blocking part of get_all_perfumes, run in the worker pool"""
     
     query = db.query(Perfume)
     
@@ -44,9 +50,14 @@ async def get_all_perfumes(
 @router.get("/perfumes/{perfume_id}", status_code=status.HTTP_200_OK)
 async def get_perfume(
     perfume_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_session)
 ):
     """Get perfume by ID"""
+    return await worker_pool.run_db(db, _get_perfume, perfume_id)
+
+
+def _get_perfume(perfume_id: str, db: Session):
+    """Blocking part of get_perfume, run in the worker pool"""
     
     perfume = db.query(Perfume).filter(Perfume.id == perfume_id).first()
     
@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_read_session, get_session
 from app.schemas.test_schema import TestAnswers, TestResultResponse
 from app.schemas.perfume_schema import AffinityResultResponse
 from app.models.user import User
 from app.models.test_result import TestResult, OlfactoryProfile
-from app.models.perfume import Perfume, PerfumeVector, AffinityResult
+from app.models.perfume import Perfume, PerfumeVector
 from app.services.test_engine import TestEngine
 from app.services.affinity_engine import AffinityEngine
+from app.services.catalog_cache import catalog_cache
+from app.services.metrics import metrics
 from app.services.nlp_generator import NLPGenerator
+from app.services.profiler import request_profiler
+from app.services.ranking_table import ranking_tables
+from app.services.result_cache import CachedRanking, CachedResponse, response_cache, result_cache
+from app.services.stage_timing import start_stage_timer
+from app.services.worker_pool import worker_pool
+from app.services.result_store import ResultStore
 
 
 router = APIRouter()
@@ -19,16 +29,38 @@ router = APIRouter()
 @router.post("/test/calculate", response_model=dict, status_code=status.HTTP_200_OK)
 async def calculate_affinity(
     test_data: TestAnswers,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    top_k: int = Query(default=3, ge=1, le=settings.TOP_K_MAX, description="Number of recommendations to return"),
+    db: Session = Depends(get_session)
 ):
     """
     Calculate affinity for submitted test answers.
     
-    Returns top perfume recommendations with affinity scores.
+    Returns the top_k perfume recommendations with affinity scores. Stage
+    durations are reported in the Server-Timing header. When profiling is
+    enabled and requested, the handler runs under cProfile and the capture id
+    is returned in X-Profile-Id.
     """
+    timer = start_stage_timer("calculate")
+    handler = _calculate_affinity
+    capture = request_profiler.start("calculate", request.headers.get(settings.PROFILING_HEADER))
+    if capture is not None:
+        handler = capture.wrap(handler)
+        response.headers["X-Profile-Id"] = capture.id
+    result = await worker_pool.run_db(db, handler, test_data, top_k, timer)
+    server_timing = timer.finish()
+    if server_timing:
+        response.headers["Server-Timing"] = server_timing
+    return result
+
+
+def _calculate_affinity(test_data: TestAnswers, top_k: int, timer, db: Session):
+    """Blocking part of calculate_affinity, run through worker_pool.run_db"""
     
     # 1. Validate answers
-    is_valid, errors = TestEngine.validate_answers(test_data.model_dump())
+    with timer.stage("validate"):
+        is_valid, errors = TestEngine.validate_answers(test_data.model_dump())
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,70 +68,90 @@ async def calculate_affinity(
         )
     
     # 2. Get or create user
-    user = db.query(User).filter(User.session_id == test_data.session_id).first()
-    if not user:
-        user = User(session_id=test_data.session_id)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    # Everything below is persisted in a single flush/commit at the end; rows
+    # are linked through relationships so their ids are assigned on flush.
+    with timer.stage("user"):
+        user = db.query(User).filter(User.session_id == test_data.session_id).first()
+        if not user:
+            user = User(session_id=test_data.session_id)
+            db.add(user)
     
-    # 3. Save test result
-    test_result = TestResult(
-        user_id=user.id,
-        answers=test_data.model_dump()
-    )
-    db.add(test_result)
-    db.commit()
-    db.refresh(test_result)
-    
-    # 4. Build olfactory profile
-    profile_data = TestEngine.build_profile(test_data.model_dump())
-    profile = OlfactoryProfile(
-        test_result_id=test_result.id,
-        **profile_data
-    )
-    db.add(profile)
-    db.commit()
-    db.refresh(profile)
+    with timer.stage("profile"):
+        # 3. Save test result
+        test_result = TestResult(
+            user=user,
+            answers=test_data.model_dump()
+        )
+        db.add(test_result)
+        
+        # 4. Build olfactory profile
+        profile_data = TestEngine.build_profile(test_data.model_dump())
+        profile = OlfactoryProfile(
+            test_result=test_result,
+            **profile_data
+        )
+        db.add(profile)
     
-    # 5. Get active perfumes filtered by gender (include unisex for both)
+    # 5. Get the cached active catalog filtered by gender (include unisex for both)
     user_gender = test_data.q0_gender  # "male" or "female"
-    perfumes = db.query(Perfume).filter(
-        Perfume.is_active == True,
-        Perfume.gender.in_([user_gender, "unisex"])
-    ).all()
+    with timer.stage("catalog"):
+        full_catalog = catalog_cache.get(db)
+        catalog = full_catalog.for_genders([user_gender, "unisex"])
     
-    if not perfumes:
+    if len(catalog) == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No perfumes available for matching"
         )
     
-    # 6. Calculate affinity for each perfume
-    affinity_results = []
+    # 6. Rank the catalog: from the result cache, then the precomputed ranking
+    # table, otherwise by scoring the whole catalog at once. Bulk and compact
+    # persistence need every score, so only cached entries holding the score
+    # array (or a live run) can serve them.
+    needs_scores = settings.AFFINITY_PERSISTENCE_MODE != "top_k"
+    ranked_k = max(settings.TOP_K_MAX, settings.AFFINITY_PERSIST_TOP_K)
+    profile_key = TestEngine.profile_key(profile_data, user_gender)
+    cache_key = f"{profile_key}:{full_catalog.fingerprint}"
+    
+    scores = None
+    ranking = None
+    ranking_source = "live"
     
-    for perfume in perfumes:
-        # Get perfume vector
-        perfume_vector = db.query(PerfumeVector).filter(
-            PerfumeVector.perfume_id == perfume.id
-        ).first()
+    with timer.stage("lookup"):
+        if settings.RESULT_CACHE_ENABLED:
+            cached = result_cache.get(cache_key)
+            if cached is not None and (cached.scores is not None or not needs_scores):
+                ranking, scores = cached.ranking, cached.scores
+                ranking_source = "cache"
         
-        if not perfume_vector:
+        if ranking is None and not needs_scores:
+            ranking = ranking_tables.lookup(
+                profile_key, full_catalog, max(top_k, settings.AFFINITY_PERSIST_TOP_K)
+            )
+            if ranking is not None:
+                ranking_source = "table"
+    
+    if ranking is None:
+        with timer.stage("score"):
+            scores, ranking = worker_pool.offload(_score_catalog, profile, catalog, ranked_k)
+        if settings.RESULT_CACHE_ENABLED:
+            result_cache.put(cache_key, CachedRanking(ranking, scores if needs_scores else None))
+    
+    top_ranking = ranking[:top_k]
+    
+    # 7. Generate text only for the results that are served
+    with timer.stage("load"):
+        pairs = ResultStore.load_perfumes(db, [perfume_id for perfume_id, _ in top_ranking])
+    
+    with timer.stage("nlp"):
+        explanations = worker_pool.offload(_explain_results, profile, top_ranking, pairs)
+    
+    top_results = []
+    for perfume_id, affinity_score in top_ranking:
+        if perfume_id not in pairs:
             continue
-        
-        # Calculate affinity
-        affinity_score, key_matches = AffinityEngine.calculate_affinity(
-            profile, perfume, perfume_vector
-        )
-        
-        # Generate description and recommendation
-        description = NLPGenerator.generate_description(
-            profile, perfume, perfume_vector, affinity_score, key_matches
-        )
-        
-        recommendation = NLPGenerator.generate_recommendation(
-            profile, perfume, perfume_vector
-        )
+        perfume, _ = pairs[perfume_id]
+        description, recommendation = explanations[perfume_id]
         
         # Determine affinity level
         if affinity_score >= 80:
@@ -111,30 +163,22 @@ async def calculate_affinity(
         else:
             level = "low"
         
-        # Save affinity result
-        affinity_result = AffinityResult(
-            profile_id=profile.id,
-            perfume_id=perfume.id,
-            affinity_score=affinity_score,
-            personalized_description=description,
-            usage_recommendation=recommendation
-        )
-        db.add(affinity_result)
-        
-        affinity_results.append({
+        top_results.append({
             "perfume": perfume,
-            "perfume_vector": perfume_vector,
             "affinity_score": affinity_score,
             "level": level,
             "description": description,
             "recommendation": recommendation
         })
     
-    db.commit()
-    
-    # 7. Sort by affinity score and get top 3
-    affinity_results.sort(key=lambda x: x["affinity_score"], reverse=True)
-    top_results = affinity_results[:3]
+    # Save according to the persistence mode, then assign ids and server
+    # defaults without committing yet
+    with timer.stage("persist"):
+        if scores is not None:
+            ResultStore.save(db, profile, catalog, scores, explanations)
+        else:
+            ResultStore.save_rows(db, profile, ranking[:settings.AFFINITY_PERSIST_TOP_K], explanations)
+        db.flush()
     
     # 8. Format response
     results = []
@@ -156,7 +200,7 @@ async def calculate_affinity(
             }
         })
     
-    return {
+    response = {
         "status": "success",
         "data": {
             "test_id": str(test_result.id),
@@ -177,33 +221,80 @@ async def calculate_affinity(
             },
             "results": results,
             "metadata": {
-                "total_perfumes_analyzed": len(perfumes),
+                "total_perfumes_analyzed": len(catalog),
                 "top_match_count": len(results),
+                "ranking_source": ranking_source,
                 "test_completed_at": test_result.completed_at.isoformat()
             }
         }
     }
+    
+    with timer.stage("commit"):
+        db.commit()
+    
+    return response
+
+
+def _score_catalog(profile: OlfactoryProfile, catalog, ranked_k: int):
+    """Score the whole catalog and rank its top ranked_k (CPU-bound)"""
+    started = time.perf_counter()
+    scores = AffinityEngine.score_catalog(profile, catalog)
+    if settings.METRICS_ENABLED:
+        metrics.observe_scoring(len(catalog), time.perf_counter() - started)
+    top = AffinityEngine.rank(scores, catalog.id_ranks, ranked_k)
+    return scores, [(catalog.ids[i], scores[i].item()) for i in top.tolist()]
+
+
+def _explain_results(profile: OlfactoryProfile, ranking, pairs):
+    """Descriptions and recommendations of the loaded perfumes in ranking (CPU-bound)"""
+    return {
+        perfume_id: NLPGenerator.explain(profile, *pairs[perfume_id], affinity_score)
+        for perfume_id, affinity_score in ranking
+        if perfume_id in pairs
+    }
 
 
 @router.get("/test/{test_id}", response_model=dict, status_code=status.HTTP_200_OK)
 async def get_test_result(
     test_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_session)
 ):
     """Get test results by test ID"""
+    cached = response_cache.get(test_id) if settings.RESPONSE_CACHE_ENABLED else None
+    if cached is None:
+        cached = CachedResponse(await worker_pool.run_db(db, _get_test_result, test_id))
+        if settings.RESPONSE_CACHE_ENABLED:
+            response_cache.put(test_id, cached)
+    
+    # Completed results never change, so clients may keep them as long as they like
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"private, max-age={settings.TEST_RESULT_MAX_AGE_SECONDS}, immutable"
+    }
+    if cached.matches(request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return cached.body
+
+
+def _get_test_result(test_id: str, db: Session):
+    """Blocking part of get_test_result, run in the worker pool"""
     
-    test_result = db.query(TestResult).filter(TestResult.id == test_id).first()
+    # Test result and profile in one statement
+    row = db.query(TestResult, OlfactoryProfile).outerjoin(
+        OlfactoryProfile, OlfactoryProfile.test_result_id == TestResult.id
+    ).filter(TestResult.id == test_id).first()
     
-    if not test_result:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Test result not found"
         )
     
-    # Get profile
-    profile = db.query(OlfactoryProfile).filter(
-        OlfactoryProfile.test_result_id == test_id
-    ).first()
+    test_result, profile = row
     
     if not profile:
         raise HTTPException(
@@ -212,31 +303,26 @@ async def get_test_result(
         )
     
     # Get affinity results
-    affinity_results = db.query(AffinityResult).filter(
-        AffinityResult.profile_id == profile.id
-    ).order_by(AffinityResult.affinity_score.desc()).limit(3).all()
-    
     results = []
-    for affinity in affinity_results:
-        perfume = db.query(Perfume).filter(Perfume.id == affinity.perfume_id).first()
-        
-        if perfume:
-            results.append({
-                "perfume": {
-                    "id": str(perfume.id),
-                    "name": perfume.name,
-                    "brand": perfume.brand,
-                    "description": perfume.description,
-                    "image_url": perfume.image_url,
-                    "purchase_url": perfume.purchase_url
-                },
-                "affinity": {
-                    "score": affinity.affinity_score,
-                    "level": "excellent" if affinity.affinity_score >= 80 else "good" if affinity.affinity_score >= 60 else "moderate",
-                    "description": affinity.personalized_description,
-                    "recommendation": affinity.usage_recommendation
-                }
-            })
+    for result in ResultStore.top_results(db, profile, limit=3):
+        perfume = result["perfume"]
+        affinity_score = result["affinity_score"]
+        results.append({
+            "perfume": {
+                "id": str(perfume.id),
+                "name": perfume.name,
+                "brand": perfume.brand,
+                "description": perfume.description,
+                "image_url": perfume.image_url,
+                "purchase_url": perfume.purchase_url
+            },
+            "affinity": {
+                "score": affinity_score,
+                "level": "excellent" if affinity_score >= 80 else "good" if affinity_score >= 60 else "moderate",
+                "description": result["description"],
+                "recommendation": result["recommendation"]
+            }
+        })
     
     return {
         "status": "success",
@@ -264,3 +350,77 @@ async def get_test_result(
             }
         }
     }
+
+
+@router.get("/profiles/{profile_id}/perfumes/{perfume_id}/explanation", response_model=dict, status_code=status.HTTP_200_OK)
+async def get_explanation(
+    profile_id: str,
+    perfume_id: str,
+    db: Session = Depends(get_read_session)
+):
+    """Explain the affinity between a stored profile and any perfume"""
+    return await worker_pool.run_db(db, _get_explanation, profile_id, perfume_id)
+
+
+def _get_explanation(profile_id: str, perfume_id: str, db: Session):
+    """Blocking part of get_explanation, run in the worker pool"""
+    
+    profile = db.query(OlfactoryProfile).filter(OlfactoryProfile.id == profile_id).first()
+    
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Olfactory profile not found"
+        )
+    
+    pairs = ResultStore.load_perfumes(db, [perfume_id])
+    
+    if perfume_id not in pairs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfume not found"
+        )
+    
+    perfume, perfume_vector = pairs[perfume_id]
+    affinity_score, description, recommendation = worker_pool.offload(
+        _explain_pair, profile, perfume, perfume_vector
+    )
+    
+    if affinity_score >= 80:
+        level = "excellent"
+    elif affinity_score >= 60:
+        level = "good"
+    elif affinity_score >= 40:
+        level = "moderate"
+    else:
+        level = "low"
+    
+    return {
+        "status": "success",
+        "data": {
+            "profile_id": str(profile.id),
+            "perfume": {
+                "id": str(perfume.id),
+                "name": perfume.name,
+                "brand": perfume.brand,
+                "description": perfume.description,
+                "image_url": perfume.image_url,
+                "purchase_url": perfume.purchase_url
+            },
+            "affinity": {
+                "score": affinity_score,
+                "level": level,
+                "description": description,
+                "recommendation": recommendation
+            }
+        }
+    }
+
+
+def _explain_pair(profile: OlfactoryProfile, perfume: Perfume, perfume_vector: PerfumeVector):
+    """Affinity score, description and recommendation of one perfume (CPU-bound)"""
+    affinity_score, _ = AffinityEngine.calculate_affinity(profile, perfume, perfume_vector)
+    description, recommendation = NLPGenerator.explain(
+        profile, perfume, perfume_vector, affinity_score
+    )
+    return affinity_score, description, recommendation
@@ -1,7 +1,8 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from app.models.test_result import OlfactoryProfile
 from app.models.perfume import PerfumeVector, Perfume
+from app.services.scoring_catalog import ScoringCatalog
 
 
 class AffinityEngine:
@@ -146,7 +147,17 @@ class AffinityEngine:
         final_score = final_score * (1 - rejection_score * 0.3)
         
         # Get key matches for description generation
-        key_matches = {
+        key_matches = AffinityEngine._family_matches(user_profile, perfume_vector)
+        
+        return round(final_score, 2), key_matches
+    
+    @staticmethod
+    def _family_matches(
+        user_profile: OlfactoryProfile,
+        perfume_vector: PerfumeVector
+    ) -> Dict[str, float]:
+        """Per-family overlap between profile and perfume"""
+        return {
             "citrus": min((user_profile.citrus or 0) * (perfume_vector.citrus or 0), 1.0),
             "floral": min((user_profile.floral or 0) * (perfume_vector.floral or 0), 1.0),
             "woody": min((user_profile.woody or 0) * (perfume_vector.woody or 0), 1.0),
@@ -155,5 +166,163 @@ class AffinityEngine:
             "green": min((user_profile.green or 0) * (perfume_vector.green or 0), 1.0),
             "aquatic": min((user_profile.aquatic or 0) * (perfume_vector.aquatic or 0), 1.0)
         }
+    
+    @staticmethod
+    def key_matches(
+        user_profile: OlfactoryProfile,
+        perfume_vector: PerfumeVector
+    ) -> Dict[str, float]:
+        """
+        Key matches for description generation.
         
-        return round(final_score, 2), key_matches
+        Same values calculate_affinity returns alongside the score, for
+        callers that ranked the catalog with score_catalog.
+        """
+        rejection_score = AffinityEngine.check_rejected_families(
+            user_profile.rejected_families or [],
+            perfume_vector
+        )
+        if rejection_score > 0.7:
+            return {}
+        return AffinityEngine._family_matches(user_profile, perfume_vector)
+    
+    @staticmethod
+    def _tag_score(user_tags: List[str], user_mask: int, perfume_masks: np.ndarray) -> np.ndarray:
+        """Vectorized share of user tags present in each perfume's tag bitmask"""
+        if not user_tags:
+            return np.full(len(perfume_masks), 0.5)
+        
+        matches = np.zeros(len(perfume_masks), dtype=np.int64)
+        bit = 0
+        while user_mask >> bit:
+            if (user_mask >> bit) & 1:
+                matches += ((perfume_masks >> np.uint64(bit)) & np.uint64(1)).astype(np.int64)
+            bit += 1
+        
+        score = matches / max(len(user_tags), 1)
+        return np.where(perfume_masks == 0, 0.5, score)
+    
+    @staticmethod
+    def score_catalog(
+        user_profile: OlfactoryProfile,
+        catalog: ScoringCatalog
+    ) -> np.ndarray:
+        """
+        Calculate affinity scores for a whole catalog at once.
+        
+        Array equivalent of calling calculate_affinity for every perfume.
+        
+        Returns:
+            Array of affinity scores aligned with catalog.ids
+        """
+        features = catalog.features
+        if len(catalog) == 0:
+            return np.zeros(0)
+        
+        # 1. Rejected families, accumulated in the same order as check_rejected_families
+        rejected = user_profile.rejected_families or []
+        rejection_intensity = np.zeros(len(catalog))
+        for family in rejected:
+            family_lower = family.lower()
+            for column, key in enumerate(ScoringCatalog.FAMILIES, start=1):
+                if key in family_lower:
+                    rejection_intensity = rejection_intensity + features[:, column]
+        rejection_score = np.minimum(rejection_intensity / max(len(rejected), 1), 1.0)
+        
+        # 2. Vector similarity (40% weight)
+        user_vector = np.array(user_profile.to_vector(), dtype=np.float64)
+        magnitude_a = np.linalg.norm(user_vector)
+        magnitude_b = np.linalg.norm(features, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vector_similarity = np.where(
+                (magnitude_a == 0) | (magnitude_b == 0),
+                0.0,
+                (features @ user_vector) / (magnitude_a * magnitude_b)
+            )
+        weighted_vector_score = vector_similarity * 0.40
+        
+        # 3. Context match (30% weight)
+        user_occasions = user_profile.occasions or []
+        user_times = user_profile.time_of_day or []
+        occasion_score = AffinityEngine._tag_score(
+            user_occasions, catalog.occasion_mask(user_occasions), catalog.occasion_masks
+        )
+        time_score = AffinityEngine._tag_score(
+            user_times, catalog.time_mask(user_times), catalog.time_masks
+        )
+        if user_profile.season:
+            all_year = catalog.season_vocab.get("all_year", -1)
+            season_match = (
+                (catalog.season_codes == catalog.season_code(user_profile.season)) |
+                (catalog.season_codes == all_year)
+            )
+            season_score = np.where(season_match, 1.0, 0.5)
+        else:
+            season_score = np.full(len(catalog), 0.5)
+        context_score = occasion_score * 0.4 + time_score * 0.4 + season_score * 0.2
+        weighted_context_score = context_score * 0.30
+        
+        # 4. Intensity and longevity match (20% weight)
+        perfume_intensity = np.where(features[:, 0] == 0, 0.5, features[:, 0])
+        perfume_longevity = np.where(catalog.longevity == 0, 0.5, catalog.longevity)
+        intensity_match = 1 - np.abs((user_profile.intensity or 0.5) - perfume_intensity)
+        longevity_match = 1 - np.abs((user_profile.longevity or 0.5) - perfume_longevity)
+        persistence_score = (intensity_match + longevity_match) / 2
+        weighted_persistence_score = persistence_score * 0.20
+        
+        # 5. Emotion match (10% weight)
+        weighted_emotion_score = 0.5 * 0.10
+        
+        # 6. Final score with rejection penalty and disqualification
+        final_score = (
+            weighted_vector_score +
+            weighted_context_score +
+            weighted_persistence_score +
+            weighted_emotion_score
+        ) * 100
+        final_score = final_score * (1 - rejection_score * 0.3)
+        final_score = np.where(rejection_score > 0.7, 0.0, final_score)
+        
+        return AffinityEngine._round_scores(final_score)
+    
+    @staticmethod
+    def rank(
+        scores: np.ndarray,
+        tie_breaker: np.ndarray,
+        k: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Positions of the k best scores, best first.
+        
+        Selection is O(N) via argpartition; only the candidates are sorted.
+        Equal scores are ordered by ascending tie_breaker so rankings are
+        stable across runs. With k=None the whole array is ranked.
+        """
+        n = len(scores)
+        if k is None or k >= n:
+            candidates = np.arange(n)
+        elif k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        else:
+            # Keep every score tied with the k-th best so ties at the cut are
+            # resolved by tie_breaker rather than by partition order
+            kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            candidates = np.flatnonzero(scores >= kth)
+        
+        order = np.lexsort((tie_breaker[candidates], -scores[candidates]))
+        return candidates[order][:k]
+    
+    @staticmethod
+    def _round_scores(scores: np.ndarray) -> np.ndarray:
+        """
+        Round scores to 2 decimals exactly like the builtin round().
+        
+        np.round scales by 100 first, which can tip values sitting on a
+        half-cent boundary the other way; those few are rounded in Python.
+        """
+        rounded = np.round(scores, 2)
+        scaled = scores * 100
+        ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+        for i in ambiguous:
+            rounded[i] = round(float(scores[i]), 2)
+        return rounded
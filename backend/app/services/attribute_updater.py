@@ -0,0 +1,174 @@
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import Column, Integer, MetaData, String, Table, and_, delete, exists, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from app.models.perfume import Perfume, PerfumeVector
+from app.services.catalog_cache import CatalogCache
+from app.services.catalog_ingest import MAX_REPORTED_ERRORS, CatalogIngestor
+
+
+class AttributeUpdater:
+    """
+    Set-based bulk updates of catalog attributes.
+    
+    Updates are staged into a temporary table and applied with one UPDATE
+    per attribute, correlated on perfume name (and brand, when given). Rows
+    already holding the new value are left alone, so the counts reflect
+    real changes. Any change bumps the catalog version in the same
+    transaction, which makes running API processes reload the scoring
+    catalog.
+    """
+    
+    # attribute -> model that stores it
+    ATTRIBUTES = {
+        "gender": Perfume,
+        "season": PerfumeVector,
+        "concentration": PerfumeVector
+    }
+    
+    @staticmethod
+    def _staging_table(metadata: MetaData) -> Table:
+        return Table(
+            "staged_attribute_updates",
+            metadata,
+            Column("seq", Integer, primary_key=True),
+            Column("name", String(255), nullable=False, index=True),
+            Column("brand", String(255)),
+            *(Column(attribute, String(50)) for attribute in AttributeUpdater.ATTRIBUTES),
+            prefixes=["TEMPORARY"]
+        )
+    
+    @staticmethod
+    def _validate(record: Dict[str, Any], attributes: List[str]) -> Optional[Dict[str, Any]]:
+        """Staging row for a record, or None when it sets none of the attributes"""
+        name = str(record.get("name") or "").strip()
+        if not name:
+            raise ValueError("name is required")
+        row = {"name": name, "brand": str(record.get("brand") or "").strip() or None}
+        for attribute in AttributeUpdater.ATTRIBUTES:
+            value = record.get(attribute) if attribute in attributes else None
+            value = str(value).strip() if value not in (None, "") else None
+            if attribute == "gender" and value is not None:
+                value = value.lower()
+                if value not in CatalogIngestor.GENDERS:
+                    raise ValueError(f"gender must be one of {sorted(CatalogIngestor.GENDERS)}, got {value!r}")
+            row[attribute] = value
+        if all(row[attribute] is None for attribute in AttributeUpdater.ATTRIBUTES):
+            return None
+        return row
+    
+    @staticmethod
+    def apply(
+        db: Session,
+        records: Iterable[Dict[str, Any]],
+        attributes: Optional[List[str]] = None,
+        batch_size: int = 5000
+    ) -> Dict[str, Any]:
+        """
+        Stage and apply attribute updates, then commit.
+        
+        Args:
+            db: Database session
+            records: Dicts with "name", an optional "brand" and new values for
+                any of ATTRIBUTES; a record without brand matches every
+                perfume with that name. When a perfume appears twice, the
+                later record wins.
+            attributes: Attributes to apply (default: all of ATTRIBUTES)
+            batch_size: Records staged per INSERT
+        
+        Returns:
+            Staged, invalid and unmatched record counts, the first unmatched
+            names, changed rows per attribute, elapsed seconds and a summary
+            {attribute: {value: perfume count}} of the whole catalog
+        """
+        attributes = list(attributes or AttributeUpdater.ATTRIBUTES)
+        unknown = set(attributes) - set(AttributeUpdater.ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown attributes: {sorted(unknown)}")
+        
+        started = time.perf_counter()
+        stats = {"staged": 0, "invalid": 0, "errors": [], "unmatched": 0, "unmatched_names": [], "changed": {}}
+        
+        # A rollback removes the staging table on PostgreSQL, but pysqlite
+        # runs CREATE TEMP TABLE outside the transaction: after a failure it
+        # stays on the pooled connection. It is then reused, emptied first.
+        connection = db.connection()
+        staged = AttributeUpdater._staging_table(MetaData())
+        staged.create(connection, checkfirst=True)
+        connection.execute(delete(staged))
+        
+        numbered = enumerate(records, start=1)
+        while True:
+            chunk = list(islice(numbered, batch_size))
+            if not chunk:
+                break
+            rows = []
+            for number, record in chunk:
+                try:
+                    row = AttributeUpdater._validate(record, attributes)
+                except (TypeError, ValueError) as e:
+                    stats["invalid"] += 1
+                    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                        stats["errors"].append((number, str(e)))
+                    continue
+                if row is not None:
+                    rows.append(row)
+            if rows:
+                connection.execute(insert(staged), rows)
+                stats["staged"] += len(rows)
+        
+        def matches(perfumes):
+            return and_(
+                staged.c.name == perfumes.c.name,
+                or_(staged.c.brand.is_(None), staged.c.brand == perfumes.c.brand)
+            )
+        
+        perfumes = Perfume.__table__
+        
+        for attribute in attributes:
+            model = AttributeUpdater.ATTRIBUTES[attribute]
+            target = model.__table__
+            # Latest staged value for the perfume behind each target row
+            if model is Perfume:
+                source = (
+                    select(staged.c[attribute])
+                    .where(matches(perfumes), staged.c[attribute].is_not(None))
+                )
+            else:
+                source = (
+                    select(staged.c[attribute])
+                    .join(perfumes, matches(perfumes))
+                    .where(perfumes.c.id == target.c.perfume_id, staged.c[attribute].is_not(None))
+                )
+            new_value = source.order_by(staged.c.seq.desc()).limit(1).scalar_subquery()
+            changing = and_(exists(source), target.c[attribute].is_distinct_from(new_value))
+            
+            result = connection.execute(update(target).where(changing).values({attribute: new_value}))
+            stats["changed"][attribute] = result.rowcount
+        
+        unmatched = select(staged.c.name).where(~exists(select(perfumes.c.id).where(matches(perfumes))))
+        stats["unmatched"] = connection.execute(
+            select(func.count()).select_from(unmatched.subquery())
+        ).scalar()
+        stats["unmatched_names"] = connection.execute(unmatched.limit(MAX_REPORTED_ERRORS)).scalars().all()
+        
+        if any(stats["changed"].values()):
+            CatalogCache.bump_version(db)
+        staged.drop(connection)
+        db.commit()
+        stats["summary"] = AttributeUpdater.summary(db, attributes)
+        stats["seconds"] = time.perf_counter() - started
+        return stats
+    
+    @staticmethod
+    def summary(db: Session, attributes: List[str]) -> Dict[str, Dict[Optional[str], int]]:
+        """Perfume counts per value of each attribute, one GROUP BY per attribute"""
+        summary = {}
+        for attribute in attributes:
+            model = AttributeUpdater.ATTRIBUTES[attribute]
+            column = getattr(model, attribute)
+            summary[attribute] = dict(db.execute(
+                select(column, func.count()).group_by(column).order_by(func.count().desc())
+            ).all())
+        return summary
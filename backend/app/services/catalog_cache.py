@@ -0,0 +1,319 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from app.config import settings
+from app.models.perfume import CatalogChange, CatalogVersion, Perfume, PerfumeVector
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.scoring_catalog import ScoringCatalog
+
+
+class CatalogCache:
+    """
+    In-process cache of the active scoring catalog.
+    
+    The catalog is rebuilt only when it changes: either the database
+    fingerprint (the CatalogVersion counter that every catalog write bumps,
+    and the latest change set) moves, or invalidate() bumps the local
+    catalog version.
+    
+    When catalog syncs recorded change sets that account for every write
+    since the last build, only the changed perfumes are reloaded and
+    patched into the cached catalog.
+    
+    With a snapshot directory, every catalog this process builds is written
+    as a memory-mapped snapshot, and a snapshot built for the current
+    database fingerprint (by this or any other worker) is opened instead of
+    querying the catalog again.
+    """
+    
+    # Beyond this share of the catalog a full rebuild is cheaper than a patch
+    MAX_INCREMENTAL_FRACTION = 0.5
+    
+    # Perfume ids per IN list when reloading changed perfumes
+    RELOAD_CHUNK = 500
+    
+    def __init__(self, check_interval: float = 0.0, snapshot_dir: Optional[str] = None):
+        self.check_interval = check_interval
+        self.snapshot_dir = snapshot_dir
+        self.version = 0
+        self._catalog: Optional[ScoringCatalog] = None
+        self._built_for: Optional[Tuple[int, Any]] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "rebuilds": 0,
+            "incremental_refreshes": 0,
+            "snapshot_loads": 0,
+            "snapshot_writes": 0,
+            "snapshot_errors": 0,
+            "invalidations": 0,
+            "last_rebuild_seconds": 0.0,
+            "last_refresh_seconds": 0.0
+        }
+    
+    @staticmethod
+    def _fingerprint(db: Session) -> Tuple[Any, ...]:
+        """
+        Cheap lookup that changes whenever a catalog write commits.
+        
+        Returns:
+            (catalog data version, latest change set version)
+        """
+        data_version, change_version = db.execute(select(
+            select(CatalogVersion.version).scalar_subquery(),
+            select(func.max(CatalogChange.version)).scalar_subquery()
+        )).one()
+        return data_version or 0, change_version or 0
+    
+    @staticmethod
+    def fingerprint_key(db: Session) -> List[Any]:
+        """Whole fingerprint as a JSON-friendly list, the key of catalog snapshots"""
+        return list(CatalogCache._fingerprint(db))
+    
+    @staticmethod
+    def data_version(db: Session) -> int:
+        """Catalog data version, as stored around change sets in CatalogChange"""
+        return CatalogCache._fingerprint(db)[0]
+    
+    @staticmethod
+    def bump_version(db: Session) -> int:
+        """
+        Bump the catalog data version in the session's transaction.
+        
+        Every write to perfumes or perfume_vectors must call this before it
+        commits; ORM flushes do so through an event listener. The catalog
+        cache of this process re-checks the fingerprint once the session
+        commits.
+        
+        Returns:
+            The new data version
+        """
+        connection = db.connection()
+        connection.execute(update(CatalogVersion.__table__).values(version=CatalogVersion.version + 1))
+        db.info["catalog_changed"] = True
+        return connection.execute(select(CatalogVersion.version)).scalar_one()
+    
+    @staticmethod
+    def _catalog_query() -> Select:
+        """Active perfumes that have a vector, with the columns ScoringCatalog needs"""
+        return (
+            select(
+                PerfumeVector.perfume_id,
+                PerfumeVector.intensity,
+                PerfumeVector.citrus,
+                PerfumeVector.floral,
+                PerfumeVector.woody,
+                PerfumeVector.sweet,
+                PerfumeVector.spicy,
+                PerfumeVector.green,
+                PerfumeVector.aquatic,
+                PerfumeVector.suitable_occasions,
+                PerfumeVector.suitable_times,
+                PerfumeVector.season,
+                PerfumeVector.longevity,
+                Perfume.gender
+            )
+            .join(Perfume, Perfume.id == PerfumeVector.perfume_id)
+            .where(Perfume.is_active == True)
+        )
+    
+    @staticmethod
+    def load_catalog(db: Session) -> ScoringCatalog:
+        """Load active perfumes that have a vector as a ScoringCatalog"""
+        return ScoringCatalog.from_rows(db.execute(CatalogCache._catalog_query()))
+    
+    def _patch(
+        self,
+        db: Session,
+        catalog: ScoringCatalog,
+        built: Tuple[Any, ...],
+        key: Tuple[Any, ...]
+    ) -> Optional[ScoringCatalog]:
+        """
+        Apply the change sets recorded since the catalog was built.
+        
+        Returns None when they do not explain the new fingerprint (a local
+        invalidation, or writes made without a change set) or when they are
+        too large to be worth patching.
+        """
+        if built[0] != key[0] or key[2] <= built[2]:
+            return None
+        
+        changes = db.execute(
+            select(
+                CatalogChange.inserted,
+                CatalogChange.updated,
+                CatalogChange.deactivated,
+                CatalogChange.fingerprint_before,
+                CatalogChange.fingerprint_after
+            )
+            .where(CatalogChange.version > built[2], CatalogChange.version <= key[2])
+            .order_by(CatalogChange.version)
+        ).all()
+        
+        # The change sets must chain from the built catalog to the current one
+        expected = built[1]
+        changed = set()
+        removed = set()
+        for inserted, updated, deactivated, before, after in changes:
+            if before != expected:
+                return None
+            expected = after
+            changed.update(inserted or [], updated or [])
+            removed.update(deactivated or [])
+        if expected != key[1]:
+            return None
+        if len(changed) + len(removed) > len(catalog) * self.MAX_INCREMENTAL_FRACTION:
+            return None
+        
+        ids = sorted(changed)
+        rows = []
+        for start in range(0, len(ids), self.RELOAD_CHUNK):
+            rows.extend(db.execute(
+                self._catalog_query().where(PerfumeVector.perfume_id.in_(ids[start:start + self.RELOAD_CHUNK]))
+            ))
+        # Changed perfumes that are no longer active are not reloaded, so they drop out
+        return catalog.apply_changes(rows, changed | removed)
+    
+    def get(self, db: Session) -> ScoringCatalog:
+        """
+        Return the cached catalog, rebuilding it if the catalog changed.
+        
+        The lock only guards the cached state; queries run outside it. With
+        async sessions they suspend on the event loop thread, so a lock held
+        across them would block every other request, including the one
+        holding it. Concurrent misses may therefore build the catalog more
+        than once; the last build published wins.
+        """
+        with self._lock:
+            now = time.monotonic()
+            catalog, built = self._catalog, self._built_for
+            if catalog is not None and now - self._last_check < self.check_interval:
+                self._stats["hits"] += 1
+                return catalog
+            self._last_check = now
+            version = self.version
+        
+        key = (version,) + self._fingerprint(db)
+        if catalog is not None and key == built:
+            with self._lock:
+                self._stats["hits"] += 1
+            return catalog
+        
+        started = time.perf_counter()
+        # After a local invalidation the database fingerprint may not have
+        # moved yet, so snapshots keyed by it cannot be trusted
+        use_snapshot = self.snapshot_dir and (built is None or built[0] == key[0])
+        snapshot = self._open_snapshot(key) if use_snapshot else None
+        patched = self._patch(db, catalog, built, key) if snapshot is None and catalog is not None else None
+        if snapshot is not None:
+            built_catalog = snapshot
+            counter = None
+        elif patched is not None:
+            built_catalog = patched
+            counter = ("incremental_refreshes", "last_refresh_seconds")
+        else:
+            built_catalog = self.load_catalog(db)
+            counter = ("rebuilds", "last_rebuild_seconds")
+        elapsed = time.perf_counter() - started
+        if use_snapshot and snapshot is None:
+            built_catalog = self._write_snapshot(built_catalog, key)
+        
+        with self._lock:
+            self._stats["misses"] += 1
+            if counter is not None:
+                self._stats[counter[0]] += 1
+                self._stats[counter[1]] = elapsed
+            self._catalog = built_catalog
+            self._built_for = key
+        return built_catalog
+    
+    def _open_snapshot(self, key: Tuple[Any, ...]) -> Optional[ScoringCatalog]:
+        """The current snapshot if it was built for this database fingerprint"""
+        current = CatalogSnapshot.current(self.snapshot_dir)
+        if current is None or current[0] != list(key[1:]):
+            return None
+        try:
+            catalog = CatalogSnapshot.load(current[1])
+        except (OSError, ValueError):
+            # Pruned between reading CURRENT and opening it, or an older format
+            with self._lock:
+                self._stats["snapshot_errors"] += 1
+            return None
+        with self._lock:
+            self._stats["snapshot_loads"] += 1
+        return catalog
+    
+    def _write_snapshot(self, catalog: ScoringCatalog, key: Tuple[Any, ...]) -> ScoringCatalog:
+        """Publish a catalog as a snapshot and serve the memory-mapped copy"""
+        try:
+            path = CatalogSnapshot.save(catalog, self.snapshot_dir, list(key[1:]))
+            mapped = CatalogSnapshot.load(path)
+        except (OSError, ValueError):
+            # Serving from memory is still correct, only not shared
+            with self._lock:
+                self._stats["snapshot_errors"] += 1
+            return catalog
+        with self._lock:
+            self._stats["snapshot_writes"] += 1
+        return mapped
+    
+    def expire(self) -> None:
+        """Re-check the database fingerprint on the next get()"""
+        with self._lock:
+            self._last_check = 0.0
+    
+    def invalidate(self) -> None:
+        """Force a rebuild on the next get() and bump the catalog version"""
+        with self._lock:
+            self.version += 1
+            self._stats["invalidations"] += 1
+            self._last_check = 0.0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit / miss / rebuild counters and current catalog size"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "version": self.version,
+                "size": len(self._catalog) if self._catalog is not None else 0
+            }
+
+
+catalog_cache = CatalogCache(
+    check_interval=settings.CATALOG_CACHE_CHECK_SECONDS,
+    snapshot_dir=settings.CATALOG_SNAPSHOT_DIR
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_catalog_change(session, flush_context):
+    """Bump the catalog version in the flushing transaction when perfumes or vectors change"""
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (Perfume, PerfumeVector)):
+            CatalogCache.bump_version(session)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _expire_on_catalog_commit(session):
+    """
+    Make this process re-check the catalog once a catalog write commits.
+    
+    Not on flush: a concurrent get() would rebuild from the committed
+    catalog and cache it as current before this transaction commits.
+    """
+    if session.info.pop("catalog_changed", False):
+        catalog_cache.expire()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_change(session):
+    session.info.pop("catalog_changed", None)
@@ -0,0 +1,389 @@
+import csv
+import hashlib
+import json
+import sqlite3
+import time
+import uuid
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.models.perfume import CatalogChange, Perfume, PerfumeVector
+from app.services.catalog_cache import CatalogCache
+from app.services.scoring_catalog import ScoringCatalog
+
+# Invalid records kept in the stats for reporting; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class CatalogIngestor:
+    """
+    Streams perfume records into the catalog in bounded batches.
+    
+    Records either follow the PERFUMES_DATA layout of populate_perfumes.py
+    (vector fields nested under "vector") or are flat, as CSV rows are. Each
+    batch is validated, matched against existing perfumes by (name, brand)
+    in one query, inserted with one multi-row INSERT per table and updated
+    with one executemany UPDATE per table. Only the current batch is held in
+    memory, whatever the size of the input.
+    
+    Every written perfume stores a content hash of its record. In sync mode
+    the input is the whole catalog: records whose hash is unchanged are
+    skipped, and active perfumes missing from the input are deactivated.
+    Every batch that changes something records a CatalogChange in the same
+    transaction, which lets the catalog cache reload only the changed
+    perfumes.
+    """
+    
+    GENDERS = {"male", "female", "unisex"}
+    LIST_FIELDS = ["suitable_occasions", "suitable_times"]
+    OPTIONAL_FIELDS = ["description", "image_url", "purchase_url", "gender", "is_active"]
+    
+    # Perfume ids per statement when deactivating
+    DEACTIVATE_CHUNK = 500
+    
+    @staticmethod
+    def read_records(path: str) -> Iterator[Dict[str, Any]]:
+        """Yield records from a .csv or .jsonl file one at a time"""
+        with open(path, encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                yield from csv.DictReader(f)
+            else:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+    
+    @staticmethod
+    def _score(value: Any, field: str, required: bool = False) -> Optional[float]:
+        if value is None or value == "":
+            if required:
+                raise ValueError(f"{field} is required")
+            return None
+        value = float(value)
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"{field} must be between 0 and 1, got {value}")
+        return value
+    
+    @staticmethod
+    def _tags(value: Any, field: str) -> List[str]:
+        if value is None or value == "":
+            return []
+        if isinstance(value, str):
+            # CSV cells hold tags separated by "|"
+            return [tag.strip() for tag in value.split("|") if tag.strip()]
+        if not isinstance(value, list):
+            raise ValueError(f"{field} must be a list")
+        return [str(tag) for tag in value]
+    
+    @staticmethod
+    def validate(record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Normalize a record into (perfume, vector) column values.
+        
+        Optional perfume fields missing from the record are left out, so
+        updates never overwrite them with defaults.
+        
+        Raises:
+            ValueError: If the record is incomplete or out of range
+        """
+        name = str(record.get("name") or "").strip()
+        brand = str(record.get("brand") or "").strip()
+        if not name or not brand:
+            raise ValueError("name and brand are required")
+        
+        perfume = {"name": name, "brand": brand}
+        for field in CatalogIngestor.OPTIONAL_FIELDS:
+            value = record.get(field)
+            if value is None or value == "":
+                continue
+            if field == "gender":
+                value = str(value).strip().lower()
+                if value not in CatalogIngestor.GENDERS:
+                    raise ValueError(f"gender must be one of {sorted(CatalogIngestor.GENDERS)}, got {value!r}")
+            elif field == "is_active":
+                value = value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes")
+            perfume[field] = value
+        
+        vector_data = record.get("vector") or record
+        vector = {
+            feature: CatalogIngestor._score(vector_data.get(feature), feature, required=feature == "intensity") or 0.0
+            for feature in ScoringCatalog.FEATURES
+        }
+        for field in CatalogIngestor.LIST_FIELDS:
+            vector[field] = CatalogIngestor._tags(vector_data.get(field), field)
+        vector["season"] = vector_data.get("season") or None
+        vector["longevity"] = CatalogIngestor._score(vector_data.get("longevity"), "longevity")
+        vector["concentration"] = vector_data.get("concentration") or None
+        
+        return perfume, vector
+    
+    @staticmethod
+    def content_hash(perfume: Dict[str, Any], vector: Dict[str, Any]) -> str:
+        """
+        Hash of a validated record's content.
+        
+        is_active is left out: sync mode compares it separately, so a
+        deactivated perfume coming back is reactivated without a rewrite.
+        """
+        content = {key: value for key, value in perfume.items() if key != "is_active"}
+        content["vector"] = vector
+        encoded = json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def write_batch(
+        db: Session,
+        batch: Dict[Tuple[str, str], Tuple[Dict[str, Any], Dict[str, Any]]],
+        sync: bool = False
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Upsert one batch of validated records keyed by (name, brand).
+        
+        In sync mode, existing perfumes whose content hash and active flag
+        match the record are left untouched.
+        
+        Returns:
+            (inserted, updated, unchanged) perfume ids
+        
+        A batch that writes anything also records its CatalogChange.
+        """
+        # Names are selective, so ix_perfumes_name_brand resolves the batch with
+        # one IN list (row-value IN is a full scan on SQLite); same-named
+        # perfumes of other brands are dropped here
+        existing = {}
+        for name, brand, perfume_id, content_hash, is_active, vector_id in db.execute(
+            select(Perfume.name, Perfume.brand, Perfume.id, Perfume.content_hash, Perfume.is_active, PerfumeVector.id)
+            .outerjoin(PerfumeVector, PerfumeVector.perfume_id == Perfume.id)
+            .where(Perfume.name.in_({name for name, _ in batch}))
+        ):
+            if (name, brand) in batch:
+                existing.setdefault((name, brand), (perfume_id, content_hash, is_active, vector_id))
+        
+        new_perfumes = []
+        new_vectors = []
+        perfume_updates = []
+        vector_updates = []
+        unchanged = []
+        
+        for key, (perfume, vector) in batch.items():
+            if sync:
+                # The input is the whole catalog, so listed perfumes are active
+                perfume.setdefault("is_active", True)
+            content_hash = CatalogIngestor.content_hash(perfume, vector)
+            
+            if key in existing:
+                perfume_id, stored_hash, is_active, vector_id = existing[key]
+                if sync and vector_id is not None and stored_hash == content_hash and is_active == perfume["is_active"]:
+                    unchanged.append(perfume_id)
+                    continue
+                perfume_updates.append({"id": perfume_id, **perfume, "content_hash": content_hash})
+            else:
+                # Ids are generated here so vectors need no flush to reference them
+                perfume_id, vector_id = str(uuid.uuid4()), None
+                new_perfumes.append({
+                    "id": perfume_id,
+                    "description": None,
+                    "image_url": None,
+                    "purchase_url": None,
+                    "gender": "unisex",
+                    "is_active": True,
+                    **perfume,
+                    "content_hash": content_hash
+                })
+            
+            if vector_id is None:
+                new_vectors.append({"id": str(uuid.uuid4()), "perfume_id": perfume_id, **vector})
+            else:
+                vector_updates.append({"id": vector_id, **vector})
+        
+        # Core executemany: one cached statement per table, no ORM bookkeeping
+        if new_perfumes:
+            db.execute(insert(Perfume.__table__), new_perfumes)
+        if new_vectors:
+            db.execute(insert(PerfumeVector.__table__), new_vectors)
+        if perfume_updates:
+            db.execute(update(Perfume), perfume_updates)
+        if vector_updates:
+            db.execute(update(PerfumeVector), vector_updates)
+        
+        inserted = [row["id"] for row in new_perfumes]
+        updated = [row["id"] for row in perfume_updates]
+        if inserted or updated:
+            CatalogIngestor.record_change(db, inserted=inserted, updated=updated)
+        return inserted, updated, unchanged
+    
+    @staticmethod
+    def record_change(
+        db: Session,
+        inserted: List[str] = (),
+        updated: List[str] = (),
+        deactivated: List[str] = ()
+    ) -> int:
+        """
+        Bump the catalog version and record the change set explaining it,
+        in the current transaction.
+        
+        Returns:
+            Version of the change set
+        """
+        after = CatalogCache.bump_version(db)
+        result = db.execute(insert(CatalogChange.__table__).values(
+            inserted=list(inserted),
+            updated=list(updated),
+            deactivated=list(deactivated),
+            # The bump holds the write lock, so nothing else moved the version
+            fingerprint_before=after - 1,
+            fingerprint_after=after
+        ))
+        return result.inserted_primary_key[0]
+    
+    @staticmethod
+    def deactivate_missing(db: Session, seen: "SeenIds") -> int:
+        """
+        Deactivate active perfumes whose ids are not in seen.
+        
+        Active ids are paged by id, DEACTIVATE_CHUNK at a time, and each
+        chunk's deactivations are recorded as their own change set.
+        
+        Returns:
+            Number of deactivated perfumes
+        """
+        deactivated = 0
+        last = ""
+        while True:
+            chunk = db.execute(
+                select(Perfume.id)
+                .where(Perfume.is_active == True, Perfume.id > last)
+                .order_by(Perfume.id)
+                .limit(CatalogIngestor.DEACTIVATE_CHUNK)
+            ).scalars().all()
+            if not chunk:
+                return deactivated
+            last = chunk[-1]
+            missing = seen.missing(chunk)
+            if missing:
+                db.execute(update(Perfume).where(Perfume.id.in_(missing)).values(is_active=False))
+                CatalogIngestor.record_change(db, deactivated=missing)
+                deactivated += len(missing)
+    
+    @staticmethod
+    def ingest(
+        db: Session,
+        records: Iterable[Dict[str, Any]],
+        batch_size: int = 500,
+        commit_size: int = 5000,
+        on_commit: Optional[Callable[[Dict[str, Any]], None]] = None,
+        sync: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Validate and upsert a stream of records.
+        
+        Args:
+            db: Database session
+            records: Any iterable of records, consumed lazily
+            batch_size: Records validated and written per statement
+            commit_size: Records per transaction (rounded up to whole batches)
+            on_commit: Called with the running stats after every commit
+            sync: Treat the records as the whole catalog: skip unchanged
+                perfumes and deactivate the ones missing from the input.
+                Deactivation is skipped when any record is invalid, since
+                the input is then incomplete.
+        
+        Returns:
+            Counters for read, inserted, updated, unchanged, deactivated and
+            invalid records, the first invalid records as (record number,
+            error), the version of the last change set recorded (None when
+            nothing changed), elapsed seconds and records per second
+        """
+        stats = {
+            "read": 0, "inserted": 0, "updated": 0, "unchanged": 0, "deactivated": 0, "invalid": 0,
+            "errors": [], "version": None, "seconds": 0.0, "rate": 0.0
+        }
+        started = time.perf_counter()
+        seen = SeenIds() if sync else None
+        uncommitted = 0
+        numbered = enumerate(records, start=1)
+        
+        def commit():
+            db.commit()
+            stats["seconds"] = time.perf_counter() - started
+            stats["rate"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+            if on_commit is not None:
+                on_commit(stats)
+        
+        try:
+            while True:
+                chunk = list(islice(numbered, batch_size))
+                if not chunk:
+                    break
+                
+                batch = {}
+                for number, record in chunk:
+                    try:
+                        perfume, vector = CatalogIngestor.validate(record)
+                    except (TypeError, ValueError) as e:
+                        stats["invalid"] += 1
+                        if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                            stats["errors"].append((number, str(e)))
+                        continue
+                    # A later record for the same perfume wins
+                    batch[(perfume["name"], perfume["brand"])] = (perfume, vector)
+                
+                stats["read"] += len(chunk)
+                if batch:
+                    inserted, updated, unchanged = CatalogIngestor.write_batch(db, batch, sync=sync)
+                    stats["inserted"] += len(inserted)
+                    stats["updated"] += len(updated)
+                    stats["unchanged"] += len(unchanged)
+                    if inserted or updated:
+                        stats["version"] = CatalogCache.fingerprint_key(db)[1]
+                    if sync:
+                        seen.update(inserted, updated, unchanged)
+                
+                # Each batch's change set is written with it, so a commit
+                # never exposes changes without the change set explaining them
+                uncommitted += len(chunk)
+                if uncommitted >= commit_size:
+                    commit()
+                    uncommitted = 0
+            
+            if sync and not stats["invalid"]:
+                stats["deactivated"] = CatalogIngestor.deactivate_missing(db, seen)
+                if stats["deactivated"]:
+                    stats["version"] = CatalogCache.fingerprint_key(db)[1]
+        finally:
+            if seen is not None:
+                seen.close()
+        
+        commit()
+        return stats
+
+
+class SeenIds:
+    """
+    Perfume ids listed by a catalog sync.
+    
+    They are kept in a private temporary SQLite database rather than a
+    set, so a sync holds only its current batch in memory whatever the
+    size of the catalog.
+    """
+    
+    def __init__(self):
+        # An empty filename opens a temporary on-disk database, deleted on close
+        self._db = sqlite3.connect("")
+        self._db.execute("CREATE TABLE seen (id TEXT PRIMARY KEY) WITHOUT ROWID")
+    
+    def update(self, *groups: List[str]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO seen (id) VALUES (?)",
+            ((perfume_id,) for group in groups for perfume_id in group)
+        )
+    
+    def missing(self, ids: List[str]) -> List[str]:
+        """The ids that were not seen, in their original order"""
+        placeholders = ", ".join("?" * len(ids))
+        found = {row[0] for row in self._db.execute(f"SELECT id FROM seen WHERE id IN ({placeholders})", ids)}
+        return [perfume_id for perfume_id in ids if perfume_id not in found]
+    
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from app.services.scoring_catalog import ScoringCatalog
+
+
+class CatalogSnapshot:
+    """
+    Versioned on-disk copy of a ScoringCatalog, opened memory-mapped.
+    
+    Each version is a directory of .npy arrays plus a meta.json with the
+    vocabularies, the catalog fingerprint and the database fingerprint it
+    was built for. Rows are stored grouped by gender, so the per-gender
+    subsets every worker scores are slices of the mapped arrays. A CURRENT
+    file names the live version. Versions are written to a temporary
+    directory and published with renames, so readers only ever see complete
+    snapshots. Every process that opens the same version maps the same
+    page-cache pages instead of holding its own copy of the arrays.
+    """
+    
+    FORMAT = 2
+    ARRAYS = ["ids", "features", "longevity", "season_codes", "occasion_masks", "time_masks", "gender_codes", "id_ranks"]
+    
+    # Superseded versions kept next to the current one for processes still reading them
+    KEEP_VERSIONS = 2
+    
+    @staticmethod
+    def version_name(key: List[Any]) -> str:
+        """Directory name for the database fingerprint a snapshot was built for"""
+        # The format is part of the name so a new format never reuses an older version's directory
+        digest = hashlib.blake2b(json.dumps([CatalogSnapshot.FORMAT, key]).encode("utf-8"), digest_size=6).hexdigest()
+        return f"v{key[-1]:06d}-{digest}"
+    
+    @staticmethod
+    def current(directory: str) -> Optional[Tuple[List[Any], str]]:
+        """(database fingerprint, path) of the live snapshot, or None if there is none"""
+        try:
+            with open(os.path.join(directory, "CURRENT"), encoding="utf-8") as f:
+                path = os.path.join(directory, f.read().strip())
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)["key"], path
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+    
+    @staticmethod
+    def save(catalog: ScoringCatalog, directory: str, key: List[Any]) -> str:
+        """
+        Write a catalog as a new version and make it current.
+        
+        Concurrent writers of the same version are harmless: the first
+        rename wins and the others discard their copy.
+        
+        Returns:
+            Path of the version directory
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = CatalogSnapshot.version_name(key)
+        path = os.path.join(directory, name)
+        
+        if not os.path.isdir(path):
+            tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+            os.makedirs(tmp_path, exist_ok=True)
+            catalog = catalog.grouped_by_gender()
+            arrays = {
+                "ids": np.array(catalog.ids, dtype=f"U{max(map(len, catalog.ids), default=1)}"),
+                "features": catalog.features,
+                "longevity": catalog.longevity,
+                "season_codes": catalog.season_codes,
+                "occasion_masks": catalog.occasion_masks,
+                "time_masks": catalog.time_masks,
+                "gender_codes": catalog.gender_codes,
+                "id_ranks": catalog.id_ranks
+            }
+            for array_name, array in arrays.items():
+                np.save(os.path.join(tmp_path, f"{array_name}.npy"), np.ascontiguousarray(array))
+            meta = {
+                "format": CatalogSnapshot.FORMAT,
+                "key": key,
+                "fingerprint": catalog.fingerprint,
+                # Pairs rather than objects: the gender vocabulary can hold None
+                "season_vocab": list(catalog.season_vocab.items()),
+                "occasion_vocab": list(catalog.occasion_vocab.items()),
+                "time_vocab": list(catalog.time_vocab.items()),
+                "gender_vocab": list(catalog.gender_vocab.items()),
+                "gender_ranges": [[code, start, stop] for code, (start, stop) in catalog.gender_ranges.items()]
+            }
+            with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        
+        tmp_current = os.path.join(directory, f".CURRENT.{os.getpid()}.tmp")
+        with open(tmp_current, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(tmp_current, os.path.join(directory, "CURRENT"))
+        
+        CatalogSnapshot.prune(directory, keep=name)
+        return path
+    
+    @staticmethod
+    def prune(directory: str, keep: str) -> None:
+        """Delete all but the newest KEEP_VERSIONS versions besides keep"""
+        versions = sorted(
+            (entry for entry in os.scandir(directory) if entry.is_dir() and entry.name.startswith("v") and entry.name != keep),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        for entry in versions[CatalogSnapshot.KEEP_VERSIONS:]:
+            # Processes still mapping these files keep their pages until they swap
+            shutil.rmtree(entry.path, ignore_errors=True)
+    
+    @staticmethod
+    def load(path: str) -> ScoringCatalog:
+        """Open a version directory as a read-only, memory-mapped ScoringCatalog"""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != CatalogSnapshot.FORMAT:
+            raise ValueError(f"Unsupported catalog snapshot format: {meta.get('format')!r}")
+        
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in CatalogSnapshot.ARRAYS
+        }
+        catalog = ScoringCatalog(
+            ids=arrays["ids"],
+            features=arrays["features"],
+            longevity=arrays["longevity"],
+            season_codes=arrays["season_codes"],
+            occasion_masks=arrays["occasion_masks"],
+            time_masks=arrays["time_masks"],
+            season_vocab=dict(meta["season_vocab"]),
+            occasion_vocab=dict(meta["occasion_vocab"]),
+            time_vocab=dict(meta["time_vocab"]),
+            gender_codes=arrays["gender_codes"],
+            gender_vocab=dict(meta["gender_vocab"]),
+            gender_ranges={code: (start, stop) for code, start, stop in meta["gender_ranges"]}
+        )
+        # Derived values travel with the snapshot instead of being recomputed per process
+        catalog._id_ranks = arrays["id_ranks"]
+        catalog._fingerprint = meta["fingerprint"]
+        return catalog
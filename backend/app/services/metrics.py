@@ -0,0 +1,204 @@
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+from app.services.catalog_cache import catalog_cache
+from app.services.query_tracker import QueryStats, current_queries
+from app.services.ranking_table import ranking_tables
+from app.services.result_cache import response_cache, result_cache
+from app.services.stage_timing import HistogramRegistry, stage_histograms
+from app.services.worker_pool import worker_pool
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    In-process metrics rendered in the Prometheus text format.
+    
+    Request latency and per-request database usage are recorded by
+    MetricsMiddleware; scoring throughput by the scoring path. Cache, worker
+    pool and catalog figures are read from their owners at scrape time, so
+    they cost nothing between scrapes.
+    """
+    
+    # Buckets for statements per request
+    QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+    
+    def __init__(self):
+        self.request_seconds = HistogramRegistry(("method", "route"))
+        self.request_queries = HistogramRegistry(("route",), buckets=self.QUERY_BUCKETS)
+        self.request_db_seconds = HistogramRegistry(("route",))
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._scored = 0
+        self._scoring_seconds = 0.0
+    
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float, queries: QueryStats) -> None:
+        with self._lock:
+            key = (method, route, status_code)
+            self._requests[key] = self._requests.get(key, 0) + 1
+        self.request_seconds.observe((((method, route), seconds),))
+        self.request_queries.observe((((route,), queries.count),))
+        self.request_db_seconds.observe((((route,), queries.seconds),))
+    
+    def observe_scoring(self, perfumes: int, seconds: float) -> None:
+        """Record one whole-catalog scoring run"""
+        with self._lock:
+            self._scored += perfumes
+            self._scoring_seconds += seconds
+    
+    @staticmethod
+    def _histogram(lines: List[str], name: str, help_text: str, registry: HistogramRegistry) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, buckets, total, count in registry.collect():
+            for bound, cumulative in buckets:
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{name}_bucket{_labels(registry.labels, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(registry.labels, key)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(registry.labels, key)} {count}")
+    
+    @staticmethod
+    def _metric(
+        lines: List[str],
+        name: str,
+        metric_type: str,
+        help_text: str,
+        samples: Iterable[Tuple[Dict[str, Any], float]]
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        
+        with self._lock:
+            requests = sorted(self._requests.items())
+            scored, scoring_seconds = self._scored, self._scoring_seconds
+        
+        self._metric(lines, "neuroscent_requests_total", "counter", "HTTP requests by route and status", [
+            ({"method": method, "route": route, "status": status_code}, count)
+            for (method, route, status_code), count in requests
+        ])
+        self._histogram(lines, "neuroscent_request_duration_seconds", "HTTP request latency by route", self.request_seconds)
+        self._histogram(lines, "neuroscent_stage_duration_seconds", "Latency per request stage", stage_histograms)
+        self._histogram(lines, "neuroscent_db_queries_per_request", "SQL statements executed per request", self.request_queries)
+        self._histogram(lines, "neuroscent_db_seconds_per_request", "Time spent in SQL statements per request", self.request_db_seconds)
+        
+        self._metric(lines, "neuroscent_perfumes_scored_total", "counter", "Perfumes scored by live ranking", [({}, scored)])
+        self._metric(lines, "neuroscent_scoring_seconds_total", "counter", "Time spent scoring catalogs", [({}, scoring_seconds)])
+        self._metric(lines, "neuroscent_scoring_perfumes_per_second", "gauge", "Average live scoring throughput", [
+            ({}, scored / scoring_seconds if scoring_seconds else 0.0)
+        ])
+        
+        catalog = catalog_cache.stats()
+        self._metric(lines, "neuroscent_catalog_perfumes", "gauge", "Perfumes in the cached scoring catalog", [({}, catalog["size"])])
+        self._metric(lines, "neuroscent_catalog_rebuilds_total", "counter", "Full catalog rebuilds", [({}, catalog["rebuilds"])])
+        self._metric(lines, "neuroscent_catalog_incremental_refreshes_total", "counter", "Catalog refreshes from change sets", [
+            ({}, catalog["incremental_refreshes"])
+        ])
+        
+        caches = {
+            "catalog": catalog,
+            "result": result_cache.stats(),
+            "response": response_cache.stats(),
+            "ranking_table": ranking_tables.stats()
+        }
+        self._metric(lines, "neuroscent_cache_hits_total", "counter", "Cache hits", [
+            ({"cache": cache}, stats["hits"]) for cache, stats in caches.items()
+        ])
+        self._metric(lines, "neuroscent_cache_misses_total", "counter", "Cache misses", [
+            ({"cache": cache}, stats["misses"]) for cache, stats in caches.items()
+        ])
+        self._metric(lines, "neuroscent_cache_hit_ratio", "gauge", "Cache hits over lookups since startup", [
+            ({"cache": cache}, stats["hits"] / (stats["hits"] + stats["misses"]) if stats["hits"] + stats["misses"] else 0.0)
+            for cache, stats in caches.items()
+        ])
+        self._metric(lines, "neuroscent_cache_entries", "gauge", "Entries held by in-process caches", [
+            ({"cache": cache}, caches[cache]["entries"]) for cache in ("result", "response")
+        ])
+        self._metric(lines, "neuroscent_cache_bytes", "gauge", "Approximate bytes held by in-process caches", [
+            ({"cache": cache}, caches[cache]["bytes"]) for cache in ("result", "response")
+        ])
+        
+        pool = worker_pool.stats()
+        self._metric(lines, "neuroscent_worker_pool_active", "gauge", "Jobs running in the worker pool", [({}, pool["active"])])
+        self._metric(lines, "neuroscent_worker_pool_queued", "gauge", "Jobs waiting for a worker", [({}, pool["queued"])])
+        self._metric(lines, "neuroscent_worker_pool_saturation", "gauge", "Pending jobs over pool plus queue capacity", [
+            ({}, pool["saturation"])
+        ])
+        self._metric(lines, "neuroscent_worker_pool_rejected_total", "counter", "Jobs rejected with 503", [({}, pool["rejected"])])
+        self._metric(lines, "neuroscent_worker_pool_wait_seconds_total", "counter", "Time jobs spent queued", [
+            ({}, pool["wait_seconds_total"])
+        ])
+        
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and SQL usage per route.
+    
+    Routes are labelled by their path template, so ids in URLs do not
+    create new series; unmatched paths share one "unmatched" label.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Any, str] = {}
+    
+    def _route(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = next(
+                (candidate.path for candidate in scope["app"].routes if getattr(candidate, "endpoint", None) is endpoint),
+                "unmatched"
+            )
+            self._routes[endpoint] = route
+        return route
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status_code = 500
+        queries = QueryStats()
+        token = current_queries.set(queries)
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_queries.reset(token)
+            metrics.observe_request(scope["method"], self._route(scope), status_code, time.perf_counter() - started, queries)
+
+
+metrics = Metrics()
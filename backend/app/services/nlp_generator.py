@@ -1,6 +1,7 @@
-from typing import Dict
+from typing import Dict, Tuple
 from app.models.test_result import OlfactoryProfile
 from app.models.perfume import Perfume, PerfumeVector
+from app.services.affinity_engine import AffinityEngine
 
 
 class NLPGenerator:
@@ -119,3 +120,25 @@ class NLPGenerator:
             return "Recomendado " + ", ".join(recommendations) + "."
         else:
             return "Versátil para múltiples ocasiones."
+    
+    @staticmethod
+    def explain(
+        user_profile: OlfactoryProfile,
+        perfume: Perfume,
+        perfume_vector: PerfumeVector,
+        affinity_score: float
+    ) -> Tuple[str, str]:
+        """
+        Generate description and usage recommendation for one ranked perfume.
+        
+        Returns:
+            Tuple of (description, recommendation)
+        """
+        key_matches = AffinityEngine.key_matches(user_profile, perfume_vector)
+        description = NLPGenerator.generate_description(
+            user_profile, perfume, perfume_vector, affinity_score, key_matches
+        )
+        recommendation = NLPGenerator.generate_recommendation(
+            user_profile, perfume, perfume_vector
+        )
+        return description, recommendation
@@ -0,0 +1,161 @@
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+
+
+class ProfileCapture:
+    """
+    One request being profiled.
+    
+    wrap() returns the handler's blocking function with cProfile enabled
+    around it, in whichever thread runs it (a worker pool thread for sync
+    sessions). The profile is stored when the function returns or raises.
+    """
+    
+    def __init__(self, profiler: "RequestProfiler", profile_id: str, route: str):
+        self.profiler = profiler
+        self.id = profile_id
+        self.route = route
+    
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def profiled(*args: Any) -> Any:
+            profile = cProfile.Profile()
+            self.profiler._begin()
+            started_at = datetime.now()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                return fn(*args)
+            finally:
+                profile.disable()
+                self.profiler._finish(self, profile, started_at, time.perf_counter() - started)
+        return profiled
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile captures of single requests, kept in memory.
+    
+    A request is profiled only when profiling is enabled, it carries the
+    trigger header set to PROFILING_TOKEN and no capture started in the last
+    min_interval seconds, so a flood of flagged requests costs at most one
+    profiled request per interval. The newest max_profiles captures are kept
+    (per process) as raw pstats data.
+    """
+    
+    def __init__(self, min_interval: float, max_profiles: int):
+        self.min_interval = min_interval
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._active = 0
+        self._last_started = float("-inf")
+        self._stats = {"captured": 0, "rate_limited": 0, "rejected": 0}
+    
+    @staticmethod
+    def authorized(header_value: Optional[str]) -> bool:
+        """
+        Whether a trigger / admin header value is accepted.
+        
+        Only the configured PROFILING_TOKEN is; without one, profiling and
+        the admin endpoints are closed.
+        """
+        if header_value is None or not settings.PROFILING_TOKEN:
+            return False
+        return hmac.compare_digest(header_value.encode("utf-8"), settings.PROFILING_TOKEN.encode("utf-8"))
+    
+    def start(self, route: str, header_value: Optional[str]) -> Optional[ProfileCapture]:
+        """A capture for this request, or None if it is not flagged, not allowed or rate limited"""
+        if not settings.PROFILING_ENABLED or header_value is None:
+            return None
+        with self._lock:
+            if not self.authorized(header_value):
+                self._stats["rejected"] += 1
+                return None
+            now = time.monotonic()
+            if now - self._last_started < self.min_interval:
+                self._stats["rate_limited"] += 1
+                return None
+            self._last_started = now
+            return ProfileCapture(self, f"{next(self._ids):06d}", route)
+    
+    def _begin(self) -> None:
+        with self._lock:
+            self._active += 1
+    
+    def _finish(self, capture: ProfileCapture, profile: cProfile.Profile, started_at: datetime, seconds: float) -> None:
+        profile.create_stats()
+        record = {
+            "id": capture.id,
+            "route": capture.route,
+            "started_at": started_at.isoformat(),
+            "seconds": seconds,
+            # Same bytes as Profile.dump_stats(); loadable with pstats.Stats(path)
+            "data": marshal.dumps(profile.stats)
+        }
+        with self._lock:
+            self._active -= 1
+            self._stats["captured"] += 1
+            self._profiles[capture.id] = record
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored captures, newest first, without their data"""
+        with self._lock:
+            records = list(self._profiles.values())
+        return [
+            {key: value for key, value in record.items() if key != "data"}
+            for record in reversed(records)
+        ]
+    
+    def pstats_data(self, profile_id: str) -> Optional[bytes]:
+        """Raw pstats data of a capture (None if unknown or evicted)"""
+        with self._lock:
+            record = self._profiles.get(profile_id)
+        return record["data"] if record is not None else None
+    
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Text report of the limit most expensive functions by sort key"""
+        data = self.pstats_data(profile_id)
+        if data is None:
+            return None
+        stats = pstats.Stats(_MarshalledProfile(data), stream=io.StringIO())
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stats.stream.getvalue()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.PROFILING_ENABLED,
+                "min_interval_seconds": self.min_interval,
+                "stored": len(self._profiles),
+                "active": self._active,
+                **self._stats
+            }
+
+
+class _MarshalledProfile:
+    """Adapter letting pstats.Stats load stats from bytes instead of a file"""
+    
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+    
+    def create_stats(self) -> None:
+        pass
+
+
+request_profiler = RequestProfiler(
+    min_interval=settings.PROFILING_MIN_INTERVAL_SECONDS,
+    max_profiles=settings.PROFILING_MAX_PROFILES
+)
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget() when a block runs more statements than allowed"""
+
+
+class QueryStats:
+    """
+    Statements executed and time spent in the database.
+    
+    Statements are also counted per shape: the SQL text, whose parameters
+    are bound separately, so the same query with different ids is one shape.
+    A shape executed many times in one request is the signature of an N+1
+    access pattern.
+    """
+    
+    __slots__ = ("count", "seconds", "shapes", "_lock")
+    
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[statement] = self.shapes.get(statement, 0) + 1
+    
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """(statement, executions) for shapes run at least threshold times, most frequent first"""
+        with self._lock:
+            suspects = [(statement, count) for statement, count in self.shapes.items() if count >= threshold]
+        return sorted(suspects, key=lambda item: -item[1])
+
+
+# Set per request by the middlewares; worker pool jobs inherit it
+current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+# Process-wide observers registered by track_queries(), whatever the thread
+_observers: List[QueryStats] = []
+_observers_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_queries.get() is not None or _observers:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    stats = current_queries.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    for observer in _observers:
+        observer.record(statement, seconds)
+
+
+def install() -> None:
+    """Track statements on every engine (sync and async)"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count every statement executed while the block runs, in any thread.
+    
+    This also covers requests made through TestClient, whose handlers run
+    on another thread and event loop.
+    """
+    install()
+    stats = QueryStats()
+    with _observers_lock:
+        _observers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _observers_lock:
+            _observers.remove(stats)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Fail when the block executes more than max_queries statements, or any
+    statement shape more than max_repeats times.
+    
+    Usage in tests:
+        with query_budget(3, max_repeats=1):
+            client.get(f"/api/v1/test/{test_id}")
+    
+    Raises:
+        QueryBudgetExceeded: With the most repeated statements
+    """
+    with track_queries() as stats:
+        yield stats
+    
+    repeated = stats.repeated(max_repeats + 1) if max_repeats is not None else []
+    if stats.count > max_queries or repeated:
+        top = "\n".join(f"  {count}x {statement}" for statement, count in (repeated or stats.repeated(1))[:5])
+        raise QueryBudgetExceeded(
+            f"{stats.count} statements (budget {max_queries}, max repeats {max_repeats}); most repeated:\n{top}"
+        )
+
+
+class QueryTrackingMiddleware:
+    """
+    ASGI middleware reporting SQL usage per request.
+    
+    Adds X-DB-Query-Count and X-DB-Query-Time-Ms headers and, when some
+    statement shape ran at least repeat_threshold times, X-DB-N-Plus-One
+    with the number of suspect shapes. Suspects are logged as warnings,
+    every request at debug level.
+    """
+    
+    def __init__(self, app, repeat_threshold: int = 5):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Share the counter of an outer middleware (metrics) if there is one
+        stats = current_queries.get()
+        token = None
+        if stats is None:
+            stats = QueryStats()
+            token = current_queries.set(stats)
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-query-time-ms", f"{stats.seconds * 1000:.2f}".encode()))
+                suspects = stats.repeated(self.repeat_threshold)
+                if suspects:
+                    headers.append((b"x-db-n-plus-one", str(len(suspects)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if token is not None:
+                current_queries.reset(token)
+            request = f"{scope['method']} {scope['path']}"
+            for statement, count in stats.repeated(self.repeat_threshold):
+                logger.warning("N+1 suspect on %s: %d executions of %s", request, count, statement)
+            logger.debug("%s: %d statements in %.2f ms", request, stats.count, stats.seconds * 1000)
@@ -0,0 +1,205 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.models.test_result import OlfactoryProfile
+from app.services.affinity_engine import AffinityEngine
+from app.services.scoring_catalog import ScoringCatalog
+from app.services.test_engine import TestEngine
+
+
+class RankingTable:
+    """
+    Precomputed top-k rankings keyed by TestEngine.profile_key.
+    
+    Stored as a single .npz file: profile keys, the perfume ids referenced by
+    the table, an M x k matrix of indices into those ids (-1 padded) and the
+    matching scores in hundredths, plus the fingerprint of the catalog the
+    rankings were computed against.
+    """
+    
+    def __init__(
+        self,
+        catalog_fingerprint: str,
+        keys: np.ndarray,
+        perfume_ids: np.ndarray,
+        ranks: np.ndarray,
+        centiscores: np.ndarray
+    ):
+        self.catalog_fingerprint = catalog_fingerprint
+        self.keys = keys
+        self.perfume_ids = perfume_ids
+        self.ranks = ranks
+        self.centiscores = centiscores
+        self.k = ranks.shape[1]
+        self._rows = {key: row for row, key in enumerate(keys.tolist())}
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def __repr__(self):
+        return f"<RankingTable {len(self)} profiles, k={self.k}>"
+    
+    @classmethod
+    def build(
+        cls,
+        catalog: ScoringCatalog,
+        answer_sets: Iterable[Dict[str, Any]],
+        k: int
+    ) -> "RankingTable":
+        """
+        Score every distinct profile key reachable from the given answer sets.
+        
+        Answer sets without a gender cannot be served and are skipped.
+        
+        Args:
+            catalog: Full active catalog (all genders)
+            answer_sets: Test answers, as submitted to /test/calculate
+            k: Number of ranked perfumes kept per profile
+        """
+        keys = []
+        rows = []
+        seen = set()
+        
+        for answers in answer_sets:
+            gender = answers.get("q0_gender")
+            if not gender:
+                continue
+            profile_data = TestEngine.build_profile(answers)
+            key = TestEngine.profile_key(profile_data, gender)
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            subset = catalog.for_genders([gender, "unisex"])
+            scores = AffinityEngine.score_catalog(OlfactoryProfile(**profile_data), subset)
+            top = AffinityEngine.rank(scores, subset.id_ranks, k)
+            
+            keys.append(key)
+            rows.append([(subset.ids[i], scores[i].item()) for i in top.tolist()])
+        
+        perfume_ids = sorted({perfume_id for row in rows for perfume_id, _ in row})
+        positions = {perfume_id: i for i, perfume_id in enumerate(perfume_ids)}
+        
+        ranks = np.full((len(rows), k), -1, dtype=np.int32)
+        centiscores = np.zeros((len(rows), k), dtype=np.int32)
+        for r, row in enumerate(rows):
+            for c, (perfume_id, affinity_score) in enumerate(row):
+                ranks[r, c] = positions[perfume_id]
+                centiscores[r, c] = int(round(affinity_score * 100))
+        
+        return cls(
+            catalog_fingerprint=catalog.fingerprint,
+            keys=np.array(keys, dtype="U32"),
+            perfume_ids=np.array(perfume_ids, dtype="U36"),
+            ranks=ranks,
+            centiscores=centiscores
+        )
+    
+    def save(self, path: str) -> None:
+        """Write the table atomically so serving processes never see a partial file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                catalog_fingerprint=np.array(self.catalog_fingerprint),
+                keys=self.keys,
+                perfume_ids=self.perfume_ids,
+                ranks=self.ranks,
+                centiscores=self.centiscores
+            )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> "RankingTable":
+        """Load a table written by save()"""
+        with np.load(path) as data:
+            return cls(
+                catalog_fingerprint=str(data["catalog_fingerprint"]),
+                keys=data["keys"],
+                perfume_ids=data["perfume_ids"],
+                ranks=data["ranks"],
+                centiscores=data["centiscores"]
+            )
+    
+    def lookup(self, key: str, k: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        Ranked (perfume_id, affinity_score) pairs for a profile key.
+        
+        Returns None when the key is unknown or the table was built with
+        fewer than k results for a catalog that had more to offer.
+        """
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        
+        ranks = self.ranks[row]
+        valid = int(np.count_nonzero(ranks >= 0))
+        if valid < k and valid == self.k:
+            return None
+        
+        return [
+            (str(self.perfume_ids[ranks[c]]), self.centiscores[row, c].item() / 100)
+            for c in range(min(k, valid))
+        ]
+
+
+class RankingTableStore:
+    """Lazily loads the configured ranking table and reloads it when the file changes"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._table: Optional[RankingTable] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0}
+    
+    def get(self) -> Optional[RankingTable]:
+        """Current table, or None when disabled or missing"""
+        if not self.path:
+            return None
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if mtime != self._mtime:
+                self._table = RankingTable.load(self.path)
+                self._mtime = mtime
+            return self._table
+    
+    def lookup(
+        self,
+        key: str,
+        catalog: ScoringCatalog,
+        k: int
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Ranked results from the table, or None to fall back to live scoring.
+        
+        A table built for a different catalog is treated as stale.
+        """
+        table = self.get()
+        if table is None:
+            return None
+        
+        if table.catalog_fingerprint != catalog.fingerprint:
+            self._stats["stale"] += 1
+            return None
+        
+        ranking = table.lookup(key, k)
+        self._stats["hits" if ranking is not None else "misses"] += 1
+        return ranking
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit / miss / stale counters and loaded table size"""
+        table = self._table
+        return {
+            **self._stats,
+            "profiles": len(table) if table is not None else 0,
+            "k": table.k if table is not None else 0
+        }
+
+
+ranking_tables = RankingTableStore(settings.RANKING_TABLE_PATH)
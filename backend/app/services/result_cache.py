@@ -0,0 +1,127 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+
+class CachedRanking:
+    """Ranked results for one profile key and catalog"""
+    
+    def __init__(
+        self,
+        ranking: List[Tuple[str, float]],
+        scores: Optional[np.ndarray] = None
+    ):
+        self.ranking = ranking
+        self.scores = scores
+        self.created_at = time.monotonic()
+        # Rough footprint: ids and floats in the ranking plus the score array
+        self.size = 100 * len(ranking) + (scores.nbytes if scores is not None else 0)
+
+
+class CachedResponse:
+    """Rendered response body of an immutable resource and its ETag"""
+    
+    def __init__(self, body: Dict[str, Any]):
+        encoded = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str).encode()
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(encoded, digest_size=16).hexdigest()}"'
+        self.created_at = time.monotonic()
+        self.size = len(encoded)
+    
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header already names this response"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+
+class ResultCache:
+    """
+    Memoizes rankings per canonical profile key.
+    
+    Bounded by entry count and approximate bytes with LRU eviction; entries
+    older than the TTL are dropped on access. Also holds CachedResponse
+    entries, which only need the same size and created_at attributes.
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedRanking]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0}
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Cached ranking for a key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is not None and time.monotonic() - entry.created_at > self.ttl:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+    
+    def put(self, key: str, entry: Any) -> None:
+        """Store a ranking, evicting least recently used entries over the bounds"""
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+    
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key).size
+    
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, eviction counters and current footprint"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+
+
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+    ttl=settings.RESULT_CACHE_TTL_SECONDS
+)
+
+# Completed test results never change, so their responses are kept without
+# expiry, bounded only by size
+response_cache = ResultCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=float("inf")
+)
@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, contains_eager
+from app.config import settings
+from app.models.test_result import OlfactoryProfile
+from app.models.perfume import Perfume, PerfumeVector, AffinityResult, AffinityRanking
+from app.services.affinity_engine import AffinityEngine
+from app.services.nlp_generator import NLPGenerator
+from app.services.scoring_catalog import ScoringCatalog
+
+
+class ResultStore:
+    """Service for persisting and reading ranked affinity results"""
+    
+    @staticmethod
+    def save(
+        db: Session,
+        profile: OlfactoryProfile,
+        catalog: ScoringCatalog,
+        scores: np.ndarray,
+        explanations: Dict[str, Tuple[str, str]],
+        mode: Optional[str] = None,
+        top_k: Optional[int] = None
+    ) -> None:
+        """
+        Persist scored results for a profile according to the persistence mode.
+        
+        Args:
+            catalog: Catalog the scores were computed for
+            scores: Affinity scores aligned with catalog.ids
+            explanations: (description, recommendation) for the perfumes that
+                were explained; other rows are stored without text
+            mode: "bulk", "top_k" or "compact" (defaults to settings)
+            top_k: Rows kept in "top_k" mode (defaults to settings)
+        """
+        mode = mode or settings.AFFINITY_PERSISTENCE_MODE
+        top_k = top_k if top_k is not None else settings.AFFINITY_PERSIST_TOP_K
+        
+        if mode == "compact":
+            order = AffinityEngine.rank(scores, catalog.id_ranks)
+            db.add(AffinityRanking(
+                profile=profile,
+                ranking=[[catalog.ids[i], scores[i].item()] for i in order.tolist()]
+            ))
+            return
+        
+        if mode == "top_k":
+            rows = AffinityEngine.rank(scores, catalog.id_ranks, top_k).tolist()
+        elif mode == "bulk":
+            rows = range(len(catalog))
+        else:
+            raise ValueError(f"Unknown affinity persistence mode: {mode}")
+        
+        ranking = [(catalog.ids[i], scores[i].item()) for i in rows]
+        ResultStore.save_rows(db, profile, ranking, explanations)
+    
+    @staticmethod
+    def save_rows(
+        db: Session,
+        profile: OlfactoryProfile,
+        ranking: List[Tuple[str, float]],
+        explanations: Dict[str, Tuple[str, str]]
+    ) -> None:
+        """Insert (perfume_id, affinity_score) pairs as AffinityResult rows"""
+        if not ranking:
+            return
+        
+        # Profile id is assigned on flush; rows then go in as one Core
+        # executemany. The ORM bulk insert would split it wherever a row's
+        # text changes between set and NULL, so the statement count would
+        # depend on where the explained perfumes sit in the catalog.
+        db.flush()
+        db.execute(insert(AffinityResult.__table__), [
+            {
+                "profile_id": profile.id,
+                "perfume_id": perfume_id,
+                "affinity_score": affinity_score,
+                "personalized_description": explanations.get(perfume_id, (None, None))[0],
+                "usage_recommendation": explanations.get(perfume_id, (None, None))[1]
+            }
+            for perfume_id, affinity_score in ranking
+        ])
+    
+    @staticmethod
+    def top_results(
+        db: Session,
+        profile: OlfactoryProfile,
+        limit: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Read the best stored results for a profile, whichever mode stored them.
+        
+        Rows stored without text (compact rankings, unexplained bulk rows)
+        get their description and recommendation generated on read.
+        """
+        # Stored rows come back with their perfume and vector in one statement
+        affinity_results = db.query(AffinityResult, PerfumeVector).join(
+            AffinityResult.perfume
+        ).join(
+            PerfumeVector, PerfumeVector.perfume_id == Perfume.id
+        ).options(
+            contains_eager(AffinityResult.perfume)
+        ).filter(
+            AffinityResult.profile_id == profile.id
+        ).order_by(
+            # Ties in id order, as AffinityEngine.rank breaks them
+            AffinityResult.affinity_score.desc(), AffinityResult.perfume_id
+        ).limit(limit).all()
+        
+        if affinity_results:
+            top = [
+                (affinity.perfume_id, affinity.affinity_score,
+                 affinity.personalized_description, affinity.usage_recommendation)
+                for affinity, _ in affinity_results
+            ]
+            pairs = {
+                affinity.perfume_id: (affinity.perfume, perfume_vector)
+                for affinity, perfume_vector in affinity_results
+            }
+        else:
+            ranking = db.query(AffinityRanking).filter(
+                AffinityRanking.profile_id == profile.id
+            ).first()
+            
+            if not ranking:
+                return []
+            
+            top = [
+                (perfume_id, affinity_score, None, None)
+                for perfume_id, affinity_score in ranking.ranking[:limit]
+            ]
+            pairs = ResultStore.load_perfumes(db, [perfume_id for perfume_id, _, _, _ in top])
+        
+        results = []
+        for perfume_id, affinity_score, description, recommendation in top:
+            if perfume_id not in pairs:
+                continue
+            perfume, perfume_vector = pairs[perfume_id]
+            if description is None:
+                description, recommendation = NLPGenerator.explain(
+                    profile, perfume, perfume_vector, affinity_score
+                )
+            results.append({
+                "perfume": perfume,
+                "affinity_score": affinity_score,
+                "description": description,
+                "recommendation": recommendation
+            })
+        return results
+    
+    @staticmethod
+    def load_perfumes(
+        db: Session,
+        perfume_ids: List[str]
+    ) -> Dict[str, Tuple[Perfume, PerfumeVector]]:
+        """Load (perfume, vector) pairs for the given ids in one joined query"""
+        if not perfume_ids:
+            return {}
+        return {
+            perfume.id: (perfume, perfume_vector)
+            for perfume, perfume_vector in db.query(Perfume, PerfumeVector).join(
+                PerfumeVector, PerfumeVector.perfume_id == Perfume.id
+            ).filter(Perfume.id.in_(perfume_ids)).all()
+        }
@@ -0,0 +1,336 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import numpy as np
+
+
+class ScoringCatalog:
+    """
+    Columnar view of perfume vectors used for whole-catalog scoring.
+    
+    Arrays are only ever read, so they can be memory-mapped (see
+    CatalogSnapshot); ids is then a read-only array of str.
+    
+    When rows are grouped by gender (grouped_by_gender()), gender_ranges
+    holds the row range of each gender code and gender subsets are slices
+    that share the parent's arrays.
+    """
+    
+    FEATURES = ["intensity", "citrus", "floral", "woody", "sweet", "spicy", "green", "aquatic"]
+    FAMILIES = FEATURES[1:]
+    
+    # Season code reserved for missing / empty seasons
+    NO_SEASON = 0
+    
+    # Bitmasks are stored as uint64, one bit per distinct occasion / time
+    MAX_TAGS = 64
+    
+    # Row order of gender groups: with unisex in the middle, every
+    # {gender, "unisex"} subset is one contiguous range
+    GENDER_ORDER = ["male", "unisex", "female"]
+    
+    def __init__(
+        self,
+        ids: List[str],
+        features: np.ndarray,
+        longevity: np.ndarray,
+        season_codes: np.ndarray,
+        occasion_masks: np.ndarray,
+        time_masks: np.ndarray,
+        season_vocab: Dict[str, int],
+        occasion_vocab: Dict[str, int],
+        time_vocab: Dict[str, int],
+        gender_codes: Optional[np.ndarray] = None,
+        gender_vocab: Optional[Dict[str, int]] = None,
+        gender_ranges: Optional[Dict[int, Tuple[int, int]]] = None
+    ):
+        self.ids = ids
+        self.features = features
+        self.longevity = longevity
+        self.season_codes = season_codes
+        self.occasion_masks = occasion_masks
+        self.time_masks = time_masks
+        self.season_vocab = season_vocab
+        self.occasion_vocab = occasion_vocab
+        self.time_vocab = time_vocab
+        self.gender_codes = gender_codes if gender_codes is not None else np.zeros(len(ids), dtype=np.int8)
+        self.gender_vocab = gender_vocab if gender_vocab is not None else {}
+        self.gender_ranges = gender_ranges
+        self._index = None
+        self._id_ranks = None
+        self._fingerprint = None
+        self._subsets = {}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __repr__(self):
+        return f"<ScoringCatalog {len(self)} perfumes>"
+    
+    @staticmethod
+    def _tag_mask(tags: Optional[List[str]], vocab: Dict[str, int], grow: bool) -> int:
+        """Encode a list of tags as a bitmask, optionally extending the vocabulary"""
+        mask = 0
+        for tag in tags or []:
+            bit = vocab.get(tag)
+            if bit is None:
+                if not grow:
+                    continue
+                if len(vocab) >= ScoringCatalog.MAX_TAGS:
+                    raise ValueError(f"Too many distinct tags for bitmask encoding (max {ScoringCatalog.MAX_TAGS})")
+                bit = len(vocab)
+                vocab[tag] = bit
+            mask |= 1 << bit
+        return mask
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any], base: Optional["ScoringCatalog"] = None) -> "ScoringCatalog":
+        """
+        Build a catalog from perfume vector records.
+        
+        Rows can be PerfumeVector instances or Core result rows exposing the
+        same column names (perfume_id, intensity, ..., season, longevity).
+        Rows that also carry the perfume's gender get a gender code.
+        
+        With a base catalog, its vocabularies are copied and extended, so the
+        codes of both catalogs are compatible.
+        """
+        ids = []
+        features = []
+        longevity = []
+        season_codes = []
+        occasion_masks = []
+        time_masks = []
+        gender_codes = []
+        season_vocab = dict(base.season_vocab) if base is not None else {}
+        occasion_vocab = dict(base.occasion_vocab) if base is not None else {}
+        time_vocab = dict(base.time_vocab) if base is not None else {}
+        gender_vocab = dict(base.gender_vocab) if base is not None else {}
+        
+        for row in rows:
+            ids.append(str(row.perfume_id))
+            gender_codes.append(gender_vocab.setdefault(getattr(row, "gender", None), len(gender_vocab)))
+            features.append([getattr(row, name) or 0.0 for name in cls.FEATURES])
+            longevity.append(row.longevity or 0.0)
+            
+            if row.season:
+                season_codes.append(season_vocab.setdefault(row.season, len(season_vocab) + 1))
+            else:
+                season_codes.append(cls.NO_SEASON)
+            
+            occasion_masks.append(cls._tag_mask(row.suitable_occasions, occasion_vocab, grow=True))
+            time_masks.append(cls._tag_mask(row.suitable_times, time_vocab, grow=True))
+        
+        return cls(
+            ids=ids,
+            features=np.array(features, dtype=np.float64).reshape(-1, len(cls.FEATURES)),
+            longevity=np.array(longevity, dtype=np.float64),
+            season_codes=np.array(season_codes, dtype=np.int16),
+            occasion_masks=np.array(occasion_masks, dtype=np.uint64),
+            time_masks=np.array(time_masks, dtype=np.uint64),
+            season_vocab=season_vocab,
+            occasion_vocab=occasion_vocab,
+            time_vocab=time_vocab,
+            gender_codes=np.array(gender_codes, dtype=np.int8),
+            gender_vocab=gender_vocab
+        )
+    
+    def subset(self, rows: np.ndarray) -> "ScoringCatalog":
+        """Catalog restricted to the given row positions, sharing vocabularies"""
+        return ScoringCatalog(
+            ids=[self.ids[i] for i in rows.tolist()],
+            features=self.features[rows],
+            longevity=self.longevity[rows],
+            season_codes=self.season_codes[rows],
+            occasion_masks=self.occasion_masks[rows],
+            time_masks=self.time_masks[rows],
+            season_vocab=self.season_vocab,
+            occasion_vocab=self.occasion_vocab,
+            time_vocab=self.time_vocab,
+            gender_codes=self.gender_codes[rows],
+            gender_vocab=self.gender_vocab
+        )
+    
+    def slice(self, start: int, stop: int) -> "ScoringCatalog":
+        """Catalog restricted to a range of rows, as views of this catalog's arrays"""
+        catalog = ScoringCatalog(
+            ids=self.ids[start:stop],
+            features=self.features[start:stop],
+            longevity=self.longevity[start:stop],
+            season_codes=self.season_codes[start:stop],
+            occasion_masks=self.occasion_masks[start:stop],
+            time_masks=self.time_masks[start:stop],
+            season_vocab=self.season_vocab,
+            occasion_vocab=self.occasion_vocab,
+            time_vocab=self.time_vocab,
+            gender_codes=self.gender_codes[start:stop],
+            gender_vocab=self.gender_vocab
+        )
+        # Ranks within the parent still order the slice's ids
+        if self._id_ranks is not None:
+            catalog._id_ranks = self._id_ranks[start:stop]
+        return catalog
+    
+    def grouped_by_gender(self) -> "ScoringCatalog":
+        """Same catalog with rows grouped by gender in GENDER_ORDER, other genders last"""
+        position = {gender: i for i, gender in enumerate(self.GENDER_ORDER)}
+        group_order = [code for _, code in sorted(
+            (position.get(gender, len(position)), code) for gender, code in self.gender_vocab.items()
+        )]
+        group_of_code = np.zeros(max(group_order, default=0) + 1, dtype=np.int64)
+        group_of_code[group_order] = np.arange(len(group_order))
+        groups = group_of_code[self.gender_codes]
+        rows = np.argsort(groups, kind="stable")
+        
+        bounds = np.searchsorted(groups[rows], np.arange(len(group_order) + 1))
+        grouped = self.subset(rows)
+        grouped.gender_ranges = {
+            code: (int(bounds[group]), int(bounds[group + 1])) for group, code in enumerate(group_order)
+        }
+        grouped._id_ranks = self.id_ranks[rows]
+        grouped._fingerprint = self._fingerprint
+        return grouped
+    
+    def apply_changes(self, rows: Iterable[Any], removed_ids: Iterable[str]) -> "ScoringCatalog":
+        """
+        New catalog with removed_ids dropped and the given rows upserted.
+        
+        Rows take the same shape as in from_rows. Unchanged perfumes keep
+        their arrays, so only the changed rows need to be loaded.
+        """
+        added = ScoringCatalog.from_rows(rows, base=self)
+        dropped = set(removed_ids) | set(added.ids)
+        kept = self.subset(np.array(
+            [i for i, perfume_id in enumerate(self.ids) if perfume_id not in dropped],
+            dtype=np.int64
+        ))
+        return ScoringCatalog(
+            ids=kept.ids + added.ids,
+            features=np.concatenate([kept.features, added.features]),
+            longevity=np.concatenate([kept.longevity, added.longevity]),
+            season_codes=np.concatenate([kept.season_codes, added.season_codes]),
+            occasion_masks=np.concatenate([kept.occasion_masks, added.occasion_masks]),
+            time_masks=np.concatenate([kept.time_masks, added.time_masks]),
+            season_vocab=added.season_vocab,
+            occasion_vocab=added.occasion_vocab,
+            time_vocab=added.time_vocab,
+            gender_codes=np.concatenate([kept.gender_codes, added.gender_codes]),
+            gender_vocab=added.gender_vocab
+        )
+    
+    def for_genders(self, genders: List[str]) -> "ScoringCatalog":
+        """
+        Catalog restricted to the given genders, memoized per gender set.
+        
+        A slice when the genders' rows form one range (see gender_ranges),
+        otherwise a copy of the matching rows.
+        """
+        key = tuple(sorted(set(genders)))
+        if key not in self._subsets:
+            codes = [self.gender_vocab[gender] for gender in key if gender in self.gender_vocab]
+            ranges = self._contiguous_range(codes)
+            if ranges is not None:
+                self._subsets[key] = self.slice(*ranges)
+            else:
+                self._subsets[key] = self.subset(np.flatnonzero(np.isin(self.gender_codes, codes)))
+        return self._subsets[key]
+    
+    def _contiguous_range(self, codes: List[int]) -> Optional[Tuple[int, int]]:
+        """(start, stop) covering exactly the rows of the given gender codes, if there is one"""
+        if self.gender_ranges is None:
+            return None
+        ranges = sorted(self.gender_ranges[code] for code in codes if code in self.gender_ranges)
+        if not ranges:
+            return 0, 0
+        for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+            if start != stop:
+                return None
+        return ranges[0][0], ranges[-1][1]
+    
+    @property
+    def id_ranks(self) -> np.ndarray:
+        """Rank of each row's perfume id in sorted id order, used to break score ties"""
+        if self._id_ranks is None:
+            ranks = np.empty(len(self.ids), dtype=np.int64)
+            ranks[np.argsort(np.array(self.ids, dtype=object), kind="stable")] = np.arange(len(self.ids))
+            self._id_ranks = ranks
+        return self._id_ranks
+    
+    @staticmethod
+    def _canonical_codes(codes: np.ndarray, vocab: Dict[Any, int], offset: int = 0) -> Tuple[np.ndarray, List[str]]:
+        """
+        Re-encode codes as if the vocabulary held only the used entries, in sorted order.
+        
+        Returns:
+            (canonical codes, used vocabulary entries)
+        """
+        used = set(np.unique(codes).tolist())
+        names = sorted((key for key, code in vocab.items() if code in used), key=str)
+        lookup = np.arange(max(vocab.values(), default=0) + offset + 1, dtype=np.int64)
+        for canonical, key in enumerate(names):
+            lookup[vocab[key]] = canonical + offset
+        return lookup[codes], [str(key) for key in names]
+    
+    @staticmethod
+    def _canonical_masks(masks: np.ndarray, vocab: Dict[str, int]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Re-encode bitmasks as if the vocabulary held only the used tags, in sorted order.
+        
+        Returns:
+            (canonical masks, used tags)
+        """
+        used = int(np.bitwise_or.reduce(masks)) if len(masks) else 0
+        names = sorted(tag for tag, bit in vocab.items() if used >> bit & 1)
+        canonical_masks = np.zeros_like(masks)
+        for canonical, tag in enumerate(names):
+            bit = (masks >> np.uint64(vocab[tag])) & np.uint64(1)
+            canonical_masks |= bit << np.uint64(canonical)
+        return canonical_masks, names
+    
+    @property
+    def fingerprint(self) -> str:
+        """
+        Content hash of the catalog, stable across processes for identical data.
+        
+        Rows are hashed in id order with vocabulary codes normalized, so a
+        catalog patched by apply_changes hashes like a fresh full load.
+        """
+        if self._fingerprint is None:
+            order = np.argsort(self.id_ranks, kind="stable")
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update("\n".join(self.ids[i] for i in order.tolist()).encode("utf-8"))
+            vocabs = []
+            for array, vocab in (
+                (self.features, None),
+                (self.longevity, None),
+                self._canonical_codes(self.season_codes, self.season_vocab, offset=1),
+                self._canonical_masks(self.occasion_masks, self.occasion_vocab),
+                self._canonical_masks(self.time_masks, self.time_vocab),
+                self._canonical_codes(self.gender_codes, self.gender_vocab)
+            ):
+                digest.update(np.ascontiguousarray(array[order]).tobytes())
+                if vocab is not None:
+                    vocabs.append(vocab)
+            digest.update(json.dumps(vocabs).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+    
+    def position(self, perfume_id: str) -> Optional[int]:
+        """Row position of a perfume id, or None if not in the catalog"""
+        if self._index is None:
+            self._index = {perfume_id: i for i, perfume_id in enumerate(self.ids)}
+        return self._index.get(perfume_id)
+    
+    def occasion_mask(self, occasions: Optional[List[str]]) -> int:
+        """Bitmask for a user's occasions; unknown tags can never match"""
+        return self._tag_mask(occasions, self.occasion_vocab, grow=False)
+    
+    def time_mask(self, times: Optional[List[str]]) -> int:
+        """Bitmask for a user's times of day; unknown tags can never match"""
+        return self._tag_mask(times, self.time_vocab, grow=False)
+    
+    def season_code(self, season: Optional[str]) -> int:
+        """Season code for a user's season, -1 when it matches no perfume season"""
+        if not season:
+            return self.NO_SEASON
+        return self.season_vocab.get(season, -1)
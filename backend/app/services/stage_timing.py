@@ -0,0 +1,134 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.config import settings
+
+
+class LatencyHistogram:
+    """Latency histogram over fixed upper bounds in seconds, Prometheus style"""
+    
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the overflow (+Inf) bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+    
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None when empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return None
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_seconds": self.sum / self.count if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99)
+        }
+
+
+class HistogramRegistry:
+    """Thread-safe latency histograms keyed by a tuple of label values"""
+    
+    def __init__(self, labels: Tuple[str, ...], buckets: Tuple[float, ...] = LatencyHistogram.BUCKETS):
+        self.labels = labels
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, ...], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, observations: Iterable[Tuple[Tuple[str, ...], float]]) -> None:
+        """Record (label values, seconds) pairs"""
+        with self._lock:
+            for key, seconds in observations:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram(self.buckets)
+                histogram.observe(seconds)
+    
+    def collect(self) -> List[Tuple[Tuple[str, ...], List[Tuple[float, int]], float, int]]:
+        """(label values, cumulative buckets, sum, count) per histogram"""
+        with self._lock:
+            return [
+                (key, list(histogram.cumulative()), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            ]
+    
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Count, mean and p50 / p95 / p99 bucket bounds per histogram, keyed route.stage"""
+        with self._lock:
+            return {".".join(key): histogram.summary() for key, histogram in self._histograms.items()}
+
+
+class StageTimer:
+    """
+    Wall-clock time per stage of one request.
+    
+    Stages entered several times (one NLP call per result) accumulate.
+    finish() adds the request total, feeds the durations into the stage
+    histograms and renders them as a Server-Timing header value.
+    """
+    
+    def __init__(self, histograms: HistogramRegistry, route: str):
+        self.histograms = histograms
+        self.route = route
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - started
+    
+    def finish(self) -> str:
+        self.durations["total"] = time.perf_counter() - self.started
+        self.histograms.observe(((self.route, name), seconds) for name, seconds in self.durations.items())
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.durations.items())
+
+
+class NullStageTimer:
+    """Stand-in used when stage timing is disabled; every call is a no-op"""
+    
+    _context = nullcontext()
+    
+    def stage(self, name: str):
+        return self._context
+    
+    def finish(self) -> None:
+        return None
+
+
+stage_histograms = HistogramRegistry(("route", "stage"))
+null_stage_timer = NullStageTimer()
+
+
+def start_stage_timer(route: str):
+    """Timer for a new request, or the shared no-op timer when disabled"""
+    if not settings.STAGE_TIMING_ENABLED:
+        return null_stage_timer
+    return StageTimer(stage_histograms, route)
@@ -1,4 +1,6 @@
 from typing import Dict, List, Any
+import hashlib
+import json
 from app.models.test_result import OlfactoryProfile
 
 
@@ -92,6 +94,29 @@ class TestEngine:
         
         return profile_data
     
+    @staticmethod
+    def profile_key(profile_data: Dict[str, Any], gender: str) -> str:
+        """
+        Canonical key of everything that affects a profile's ranking.
+        
+        Two answer sets with the same key produce identical affinity scores:
+        emotion, concentration and reference only shape the generated text,
+        and occasions/times are compared as sets (their order is dropped).
+        """
+        canonical = {
+            "gender": gender,
+            "intensity": profile_data.get("intensity"),
+            "longevity": profile_data.get("longevity"),
+            "families": [profile_data.get(family) for family in
+                         ("citrus", "floral", "woody", "sweet", "spicy", "green", "aquatic")],
+            "rejected_families": list(profile_data.get("rejected_families") or []),
+            "time_of_day": sorted(profile_data.get("time_of_day") or []),
+            "occasions": sorted(profile_data.get("occasions") or []),
+            "season": profile_data.get("season")
+        }
+        encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+    
     @staticmethod
     def validate_answers(answers: Dict[str, Any]) -> tuple[bool, List[str]]:
         """
@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Dict, List
+from sqlalchemy import inspect
+from app.database import Base, SessionLocal, engine
+from app.models.test_result import OlfactoryProfile
+from app.services.affinity_engine import AffinityEngine
+from app.services.catalog_cache import catalog_cache
+from app.services.ranking_table import ranking_tables
+from app.services.test_engine import TestEngine
+
+
+class Warmup:
+    """
+    Startup work done once per process, before traffic is considered ready.
+    
+    check_schema() creates missing tables and lists the model columns the
+    database lacks (pending migrations). run() then loads the scoring
+    catalog, builds its per-gender subsets and scores a sample profile on
+    each, so the first /test/calculate finds every cache and NumPy code path
+    already warm. Progress is exposed through state() for the readiness
+    endpoint.
+    """
+    
+    # Representative answers scored once per gender subset; never persisted
+    SAMPLE_ANSWERS = {
+        "q1_intensity": 3,
+        "q2_preferred_families": ["citrus", "woody", "floral"],
+        "q3_rejected_families": ["spicy"],
+        "q4_emotion": "freshness",
+        "q5_time_of_day": ["morning", "night"],
+        "q6_occasions": ["work", "daily"],
+        "q7_season": "summer",
+        "q8_longevity": 3
+    }
+    GENDERS = ["male", "female"]
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {
+            "status": "pending",
+            "seconds": None,
+            "steps": {},
+            "missing_columns": [],
+            "error": None
+        }
+    
+    def _update(self, **values: Any) -> None:
+        with self._lock:
+            self._state.update(values)
+    
+    def _step(self, name: str, started: float) -> float:
+        """Record the duration of a finished step and return the current time"""
+        now = time.perf_counter()
+        with self._lock:
+            self._state["steps"][name] = now - started
+        return now
+    
+    def check_schema(self) -> List[str]:
+        """
+        Create missing tables and report model columns missing from the database.
+        
+        Missing columns are not fatal (they are deferred on the models) but
+        mean `alembic upgrade head` is pending.
+        """
+        started = time.perf_counter()
+        Base.metadata.create_all(bind=engine)
+        
+        inspector = inspect(engine)
+        missing = []
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+        
+        self._update(missing_columns=missing)
+        self._step("schema", started)
+        return missing
+    
+    def run(self) -> None:
+        """Preload the catalog and exercise the scoring path; never raises"""
+        started = time.perf_counter()
+        self._update(status="warming_up")
+        db = SessionLocal()
+        try:
+            step = time.perf_counter()
+            catalog = catalog_cache.get(db)
+            # Computed lazily, and part of every result cache key
+            catalog.fingerprint
+            step = self._step("catalog", step)
+            
+            ranking_tables.get()
+            step = self._step("ranking_table", step)
+            
+            profile_data = TestEngine.build_profile(self.SAMPLE_ANSWERS)
+            profile = OlfactoryProfile(**profile_data)
+            for gender in self.GENDERS:
+                subset = catalog.for_genders([gender, "unisex"])
+                if len(subset):
+                    scores = AffinityEngine.score_catalog(profile, subset)
+                    AffinityEngine.rank(scores, subset.id_ranks, 1)
+            self._step("scoring", step)
+            
+            self._update(status="ready", seconds=time.perf_counter() - started)
+        except Exception as e:
+            self._update(status="failed", seconds=time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+        finally:
+            db.close()
+    
+    def skip(self) -> None:
+        """Report ready without warming up (WARMUP_ENABLED=False)"""
+        self._update(status="ready", seconds=0.0)
+    
+    def state(self) -> Dict[str, Any]:
+        """Status (pending, warming_up, ready or failed), total and per-step seconds"""
+        with self._lock:
+            return {**self._state, "steps": dict(self._state["steps"])}
+
+
+warmup = Warmup()
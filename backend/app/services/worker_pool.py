@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+from app.config import settings
+
+# True while a run_db() handler runs on an async session's greenlet, i.e. on
+# the event loop thread
+_on_event_loop: contextvars.ContextVar[bool] = contextvars.ContextVar("worker_pool_on_event_loop", default=False)
+
+
+class WorkerPoolSaturated(Exception):
+    """Raised when the pool and its queue are full"""
+
+
+class WorkerPool:
+    """
+    Bounded thread pool for blocking database work and CPU-heavy scoring.
+    
+    Route handlers await run() so the event loop stays free while SQLAlchemy
+    and NumPy (which releases the GIL for array math) do their work. At most
+    size jobs run at once and queue_depth more may wait; beyond that new
+    jobs are rejected with WorkerPoolSaturated.
+    """
+    
+    def __init__(self, size: int, queue_depth: int):
+        self.size = size
+        self.queue_depth = queue_depth
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "peak_pending": 0,
+            "wait_seconds_total": 0.0,
+            "run_seconds_total": 0.0
+        }
+    
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) in the pool and await its result"""
+        with self._lock:
+            if self._pending >= self.size + self.queue_depth:
+                self._stats["rejected"] += 1
+                raise WorkerPoolSaturated(
+                    f"Worker pool saturated ({self.size} running, {self.queue_depth} queued)"
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+            self._stats["peak_pending"] = max(self._stats["peak_pending"], self._pending)
+        
+        submitted_at = time.perf_counter()
+        
+        def call():
+            started_at = time.perf_counter()
+            _on_event_loop.set(False)
+            with self._lock:
+                self._active += 1
+                self._stats["wait_seconds_total"] += started_at - submitted_at
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._stats["run_seconds_total"] += time.perf_counter() - started_at
+        
+        def done(_future):
+            # Also fires for jobs cancelled before they started
+            with self._lock:
+                self._pending -= 1
+                self._stats["completed"] += 1
+        
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="neuroscent-worker")
+            executor = self._executor
+        
+        # Jobs see the request's context variables (e.g. its query counters)
+        future = executor.submit(contextvars.copy_context().run, call)
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+    
+    async def run_db(self, db: Any, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args, session) against the request's database session.
+        
+        Sync sessions run fn in the pool. Async sessions run fn through
+        AsyncSession.run_sync, so its queries are awaited on the event loop
+        instead of occupying a worker thread; fn must hand its CPU-bound
+        steps to offload() so they still run in the pool.
+        """
+        if isinstance(db, AsyncSession):
+            token = _on_event_loop.set(True)
+            try:
+                return await db.run_sync(lambda session: fn(*args, session))
+            finally:
+                _on_event_loop.reset(token)
+        return await self.run(fn, *args, db)
+    
+    def offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a CPU-bound step fn(*args) of a run_db() handler.
+        
+        A handler on a sync session is already in the pool, so fn is called
+        directly. On an async session it is on the event loop thread: fn is
+        then awaited through run(), which keeps scoring off the loop and
+        subject to the pool's bounds (WorkerPoolSaturated when it is full).
+        """
+        if _on_event_loop.get():
+            return await_only(self.run(fn, *args))
+        return fn(*args)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Saturation gauges and cumulative counters"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "queue_depth": self.queue_depth,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "saturation": self._pending / (self.size + self.queue_depth),
+                **self._stats
+            }
+    
+    def shutdown(self) -> None:
+        """Wait for running jobs and stop the worker threads (restarted lazily)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+worker_pool = WorkerPool(size=settings.WORKER_POOL_SIZE, queue_depth=settings.WORKER_QUEUE_DEPTH)
@@ -0,0 +1,105 @@
+"""
+Script para medir el coste de la instrumentación de /metrics.
+
+Mide, sin servidor ni red:
+  - el middleware de métricas alrededor de una app ASGI vacía,
+  - los listeners de SQLAlchemy sobre `SELECT 1` en SQLite en memoria,
+  - el renderizado de /metrics con registros poblados.
+
+Uso:
+    python benchmark_metrics.py
+    python benchmark_metrics.py --requests 50000 --queries 50000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.services import query_tracker
+from app.services.metrics import Metrics, MetricsMiddleware, metrics
+from app.services.query_tracker import QueryStats, current_queries
+
+
+async def empty_app(scope, receive, send):
+    """App ASGI mínima: responde 204 sin cuerpo"""
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def time_requests(app, count):
+    """Microsegundos por petición a través de la app dada"""
+    scope = {"type": "http", "method": "GET", "path": "/", "app": None}
+    
+    async def receive():
+        return {"type": "http.request", "body": b""}
+    
+    async def send(message):
+        pass
+    
+    async def run():
+        started = time.perf_counter()
+        for _ in range(count):
+            await app(dict(scope), receive, send)
+        return time.perf_counter() - started
+    
+    return asyncio.run(run()) / count * 1e6
+
+
+def time_queries(engine, count, tracked):
+    """Microsegundos por sentencia, con o sin contador de la petición activo"""
+    token = current_queries.set(QueryStats() if tracked else None)
+    try:
+        with engine.connect() as conn:
+            started = time.perf_counter()
+            for _ in range(count):
+                conn.execute(text("SELECT 1"))
+            return (time.perf_counter() - started) / count * 1e6
+    finally:
+        current_queries.reset(token)
+
+
+def benchmark(requests, queries):
+    print("🚀 Middleware de métricas")
+    base = time_requests(empty_app, requests)
+    wrapped = time_requests(MetricsMiddleware(empty_app), requests)
+    print(f"   Sin middleware: {base:.2f} µs/petición")
+    print(f"   Con middleware: {wrapped:.2f} µs/petición (+{wrapped - base:.2f} µs)")
+    
+    print("\n🗄️  Listeners de SQL")
+    engine = create_engine("sqlite://")
+    if event.contains(Engine, "before_cursor_execute", query_tracker._before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", query_tracker._before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", query_tracker._after_cursor_execute)
+    plain = time_queries(engine, queries, tracked=False)
+    query_tracker.install()
+    idle = time_queries(engine, queries, tracked=False)
+    tracked = time_queries(engine, queries, tracked=True)
+    print(f"   Sin listeners:            {plain:.2f} µs/sentencia")
+    print(f"   Listeners, sin petición:  {idle:.2f} µs/sentencia (+{idle - plain:.2f} µs)")
+    print(f"   Listeners, con petición:  {tracked:.2f} µs/sentencia (+{tracked - plain:.2f} µs)")
+    
+    print("\n📊 Renderizado de /metrics")
+    populated = Metrics()
+    for route in range(20):
+        for _ in range(100):
+            populated.observe_request("GET", f"/api/v1/route{route}", 200, 0.01, QueryStats())
+    for registry in (populated, metrics):
+        started = time.perf_counter()
+        body = registry.render()
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"   {len(body.splitlines())} líneas en {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el coste de la instrumentación de métricas")
+    parser.add_argument("--requests", type=int, default=20000, help="Peticiones simuladas")
+    parser.add_argument("--queries", type=int, default=20000, help="Sentencias SQL ejecutadas")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("   NEUROSCENT - COSTE DE LAS MÉTRICAS")
+    print("=" * 60)
+    benchmark(args.requests, args.queries)
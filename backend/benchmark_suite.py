@@ -0,0 +1,244 @@
+"""
+Suite de benchmarks de AffinityEngine, TestEngine y NLPGenerator.
+
+Mide con datos sintéticos reproducibles (synthetic_data.py):
+  - TestEngine.build_profile por conjunto de respuestas,
+  - AffinityEngine.calculate_affinity por par perfil/perfume,
+  - NLPGenerator.explain por perfume recomendado,
+  - el ranking del catálogo completo (score_catalog y rank del top-k) con
+    catálogos de 1k, 10k, 100k y 1M perfumes.
+
+Cada medida se repite en varias rondas y se guardan la mediana y el mínimo
+en segundos por operación; las comparaciones usan el mínimo, que es el
+menos afectado por otros procesos de la máquina. Los resultados se guardan
+en JSON como línea base; con --compare se comparan con una línea base
+anterior y el script termina con código 1 si alguna medida empeora más que
+el umbral.
+
+Uso:
+    python benchmark_suite.py --output baseline.json
+    python benchmark_suite.py --sizes 1000 10000 --compare baseline.json --threshold 0.2
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.config import settings
+
+# Import ALL models to ensure they are registered with Base
+from app.models.user import User
+from app.models.test_result import TestResult, OlfactoryProfile
+from app.models.perfume import Perfume, PerfumeVector, AffinityResult
+from app.services.affinity_engine import AffinityEngine
+from app.services.catalog_ingest import CatalogIngestor
+from app.services.nlp_generator import NLPGenerator
+from app.services.test_engine import TestEngine
+from synthetic_data import synthetic_answers, synthetic_catalog, synthetic_perfumes
+
+FORMAT = 1
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# Respuestas y pares perfil/perfume de las medidas por operación
+SAMPLE_SIZE = 1000
+# Perfiles distintos con los que se ordena cada catálogo
+RANKING_PROFILES = 20
+# Operaciones de ranking por ronda: ~1M perfumes puntuados por ronda
+RANKING_WORK = 1000000
+
+
+def measure(operations, repeat):
+    """
+    Ejecuta las operaciones (callables sin argumentos) repeat veces, tras una
+    pasada de calentamiento, y devuelve los segundos por operación.
+    """
+    for operation in operations:
+        operation()
+    
+    rounds = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for operation in operations:
+                operation()
+            rounds.append((time.perf_counter() - started) / len(operations))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    
+    return {
+        "median_seconds": statistics.median(rounds),
+        "min_seconds": min(rounds),
+        "ops_per_round": len(operations),
+        "rounds": repeat
+    }
+
+
+def build_pairs(seed):
+    """Pares (perfil, perfume, vector) transitorios, sin base de datos"""
+    profiles = [
+        OlfactoryProfile(**TestEngine.build_profile(answers))
+        for answers in synthetic_answers(SAMPLE_SIZE, seed)
+    ]
+    pairs = []
+    for profile, record in zip(profiles, synthetic_perfumes(SAMPLE_SIZE, seed)):
+        perfume_data, vector_data = CatalogIngestor.validate(record)
+        pairs.append((profile, Perfume(**perfume_data), PerfumeVector(**vector_data)))
+    return pairs
+
+
+def engine_benchmarks(seed, repeat):
+    """Medidas por operación, independientes del tamaño del catálogo"""
+    results = {}
+    
+    answer_sets = synthetic_answers(SAMPLE_SIZE, seed)
+    results["test_engine.build_profile"] = measure(
+        [lambda answers=answers: TestEngine.build_profile(answers) for answers in answer_sets], repeat
+    )
+    
+    pairs = build_pairs(seed)
+    results["affinity_engine.calculate_affinity"] = measure(
+        [lambda pair=pair: AffinityEngine.calculate_affinity(*pair) for pair in pairs], repeat
+    )
+    
+    scored = [(profile, perfume, vector, AffinityEngine.calculate_affinity(profile, perfume, vector)[0])
+              for profile, perfume, vector in pairs]
+    results["nlp_generator.explain"] = measure(
+        [lambda item=item: NLPGenerator.explain(*item) for item in scored], repeat
+    )
+    
+    return results
+
+
+def ranking_benchmarks(size, seed, repeat):
+    """Puntuación y top-k del catálogo completo, por perfil"""
+    started = time.perf_counter()
+    catalog = synthetic_catalog(size, seed)
+    # id_ranks se calcula de forma perezosa: se construye aquí para que no
+    # entre en los tiempos de rank_top_k
+    _ = catalog.id_ranks
+    print(f"   Catálogo de {size} perfumes generado en {time.perf_counter() - started:.1f}s")
+    
+    cases = []
+    for answers in synthetic_answers(RANKING_PROFILES, seed):
+        subset = catalog.for_genders([answers["q0_gender"], "unisex"])
+        _ = subset.id_ranks  # rangos perezosos, fuera de las medidas
+        profile = OlfactoryProfile(**TestEngine.build_profile(answers))
+        cases.append((profile, subset, AffinityEngine.score_catalog(profile, subset)))
+    
+    count = max(1, min(len(cases) * 10, RANKING_WORK // size))
+    selected = [cases[i % len(cases)] for i in range(count)]
+    top_k = settings.TOP_K_MAX
+    
+    return {
+        f"ranking.score_catalog[{size}]": measure(
+            [lambda case=case: AffinityEngine.score_catalog(case[0], case[1]) for case in selected], repeat
+        ),
+        f"ranking.rank_top_k[{size}]": measure(
+            [lambda case=case: AffinityEngine.rank(case[2], case[1].id_ranks, top_k) for case in selected], repeat
+        )
+    }
+
+
+def environment():
+    """Datos de la máquina, necesarios para interpretar una línea base"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def run(sizes, seed, repeat):
+    print("🚀 Motores (por operación)")
+    results = engine_benchmarks(seed, repeat)
+    for size in sizes:
+        print(f"\n📦 Ranking con {size} perfumes")
+        results.update(ranking_benchmarks(size, seed, repeat))
+    
+    return {
+        "format": FORMAT,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "seed": seed,
+        "results": results
+    }
+
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def print_results(report):
+    print("\n📊 Resultados por operación (mínimo / mediana de las rondas)")
+    for name, result in report["results"].items():
+        print(f"   {name:<42} {format_seconds(result['min_seconds']):>12} / {format_seconds(result['median_seconds']):>12}")
+
+
+def compare(report, baseline, threshold):
+    """Compara los mínimos con la línea base; devuelve las medidas que empeoran"""
+    regressions = []
+    print(f"\n⚖️  Comparación con la línea base del {baseline.get('created_at')} (umbral +{threshold:.0%})")
+    if baseline.get("environment") != report["environment"]:
+        print("   ⚠️  La línea base se midió en otro entorno; las diferencias pueden no ser regresiones")
+    
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"   {name:<42} {'(sin línea base)':>12}")
+            continue
+        change = result["min_seconds"] / previous["min_seconds"] - 1
+        status = "❌" if change > threshold else "✅"
+        print(f"   {status} {name:<40} {format_seconds(previous['min_seconds']):>12} → "
+              f"{format_seconds(result['min_seconds']):>12} ({change:+.1%})")
+        if change > threshold:
+            regressions.append(name)
+    
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de los motores de NeuroScent")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Tamaños de catálogo")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos sintéticos")
+    parser.add_argument("--repeat", type=int, default=5, help="Rondas por medida")
+    parser.add_argument("--output", default=None, help="Guarda los resultados como línea base JSON")
+    parser.add_argument("--compare", default=None, help="Línea base JSON con la que comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Empeoramiento tolerado (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("   NEUROSCENT - BENCHMARKS")
+    print("=" * 60)
+    
+    report = run(args.sizes, args.seed, args.repeat)
+    print_results(report)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Línea base guardada en {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresiones por encima del {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones")
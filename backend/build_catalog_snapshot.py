@@ -0,0 +1,62 @@
+"""
+Script para generar la instantánea del catálogo de NeuroScent.
+
+Escribe el catálogo activo como una versión nueva en CATALOG_SNAPSHOT_DIR
+(arrays .npy + meta.json) y la marca como actual. Los workers de uvicorn la
+abren con mmap y comparten la memoria, así que arrancan sin volver a leer el
+catálogo de la base de datos. La API también la regenera sola cuando el
+catálogo cambia; este script sirve para dejarla lista antes de un despliegue.
+
+Uso:
+    python build_catalog_snapshot.py
+    python build_catalog_snapshot.py --output /var/lib/neuroscent/snapshots
+"""
+
+import argparse
+import time
+
+from app.config import settings
+from app.database import SessionLocal, engine, Base
+
+# Import ALL models to ensure they are registered with Base
+from app.models.user import User
+from app.models.test_result import TestResult, OlfactoryProfile
+from app.models.perfume import Perfume, PerfumeVector, AffinityResult
+from app.services.catalog_cache import CatalogCache
+from app.services.catalog_snapshot import CatalogSnapshot
+
+
+def build_catalog_snapshot(output):
+    """Carga el catálogo activo y lo publica como instantánea"""
+    db = SessionLocal()
+    
+    try:
+        print("🚀 Cargando catálogo activo...")
+        started = time.perf_counter()
+        key = CatalogCache.fingerprint_key(db)
+        catalog = CatalogCache.load_catalog(db)
+        print(f"📦 {len(catalog)} perfumes con vector")
+        
+        path = CatalogSnapshot.save(catalog, output, key)
+        elapsed = time.perf_counter() - started
+        
+        print(f"\n🎉 ¡Completado! Instantánea en {elapsed:.2f}s → {path}")
+        print(f"🔑 Huella del catálogo: {catalog.fingerprint}")
+    
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera la instantánea mmap del catálogo")
+    parser.add_argument("--output", default=settings.CATALOG_SNAPSHOT_DIR, help="Directorio de instantáneas")
+    args = parser.parse_args()
+    
+    if not args.output:
+        parser.error("Indica --output o configura CATALOG_SNAPSHOT_DIR")
+    
+    print("=" * 60)
+    print("   NEUROSCENT - INSTANTÁNEA DEL CATÁLOGO")
+    print("=" * 60)
+    Base.metadata.create_all(bind=engine)
+    build_catalog_snapshot(args.output)
@@ -0,0 +1,98 @@
+"""
+Script para precalcular la tabla de rankings de NeuroScent.
+
+Calcula el top-k de perfumes para cada perfil de respuestas y lo guarda en un
+archivo .npz que /test/calculate consulta en O(1) (ver RANKING_TABLE_PATH).
+El espacio completo de respuestas es demasiado grande para enumerarlo, así que
+los perfiles salen del historial de tests (los más frecuentes) y/o de un
+archivo JSONL con un conjunto de respuestas por línea.
+
+Uso:
+    python build_ranking_table.py --output rankings.npz --from-history 5000
+    python build_ranking_table.py --output rankings.npz --answers respuestas.jsonl
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+
+from app.config import settings
+from app.database import SessionLocal, engine, Base
+
+# Import ALL models to ensure they are registered with Base
+from app.models.user import User
+from app.models.test_result import TestResult, OlfactoryProfile
+from app.models.perfume import Perfume, PerfumeVector, AffinityResult
+from app.services.catalog_cache import CatalogCache
+from app.services.ranking_table import RankingTable
+from app.services.test_engine import TestEngine
+
+
+def most_frequent_answers(db, limit):
+    """Devuelve un conjunto de respuestas por cada uno de los perfiles más frecuentes"""
+    counts = Counter()
+    representative = {}
+    
+    for (answers,) in db.query(TestResult.answers).yield_per(1000):
+        if not answers.get("q0_gender"):
+            continue
+        key = TestEngine.profile_key(TestEngine.build_profile(answers), answers.get("q0_gender"))
+        counts[key] += 1
+        representative.setdefault(key, answers)
+    
+    return [representative[key] for key, _ in counts.most_common(limit)]
+
+
+def read_answers(path):
+    """Lee conjuntos de respuestas desde un archivo JSONL"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def build_ranking_table(output, top_k, from_history=None, answers_path=None):
+    """Construye y guarda la tabla de rankings"""
+    db = SessionLocal()
+    
+    try:
+        print("🚀 Cargando catálogo activo...")
+        catalog = CatalogCache.load_catalog(db)
+        print(f"📦 {len(catalog)} perfumes con vector")
+        
+        answer_sets = []
+        if from_history:
+            answer_sets.extend(most_frequent_answers(db, from_history))
+            print(f"📊 {len(answer_sets)} perfiles frecuentes del historial")
+        if answers_path:
+            answer_sets.extend(read_answers(answers_path))
+        
+        started = time.perf_counter()
+        table = RankingTable.build(catalog, answer_sets, top_k)
+        table.save(output)
+        elapsed = time.perf_counter() - started
+        
+        print(f"\n🎉 ¡Completado! {len(table)} perfiles (top {top_k}) en {elapsed:.2f}s → {output}")
+        print(f"🔑 Huella del catálogo: {table.catalog_fingerprint}")
+    
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precalcula rankings de afinidad por perfil")
+    parser.add_argument("--output", default="rankings.npz", help="Archivo .npz de salida")
+    parser.add_argument("--top-k", type=int, default=settings.TOP_K_MAX, help="Perfumes guardados por perfil")
+    parser.add_argument("--from-history", type=int, default=None, help="Incluir los N perfiles más frecuentes")
+    parser.add_argument("--answers", default=None, help="Archivo JSONL con respuestas a precalcular")
+    args = parser.parse_args()
+    
+    if not args.from_history and not args.answers:
+        parser.error("Indica --from-history y/o --answers")
+    
+    print("=" * 60)
+    print("   NEUROSCENT - TABLA DE RANKINGS PRECALCULADA")
+    print("=" * 60)
+    Base.metadata.create_all(bind=engine)
+    build_ranking_table(args.output, args.top_k, args.from_history, args.answers)
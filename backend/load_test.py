@@ -0,0 +1,371 @@
+"""
+Prueba de carga de extremo a extremo para la API de NeuroScent.
+
+Crea una base de datos SQLite desechable con un catálogo sintético
+(synthetic_data.py) y lanza peticiones concurrentes con asyncio + httpx,
+contra la app ASGI en el mismo proceso o contra uvicorn en un subproceso.
+Las respuestas de /test/calculate salen de un conjunto de perfiles con
+popularidad tipo Zipf (unos pocos perfiles concentran la mayoría del
+tráfico, como en producción) o de un archivo JSONL de respuestas reales.
+
+Por cada nivel de concurrencia informa del throughput, las latencias
+p50/p95/p99 y la tasa de errores por endpoint, y de la contención en
+SQLite: duración de las etapas persist y commit de /test/calculate (del
+header Server-Timing, incluye la espera por el bloqueo de escritura) y
+errores "database is locked".
+
+Uso:
+    python load_test.py --perfumes 10000 --scenario calculate --concurrency 1 8 32
+    python load_test.py --scenario mixed --requests 5000 --async-db --sqlite-profile
+    python load_test.py --uvicorn --workers 4 --scenario perfumes --concurrency 64
+    python load_test.py --answers respuestas.jsonl --duration 60 --output carga.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from synthetic_data import synthetic_answers, synthetic_perfumes
+
+API = "/api/v1"
+CALCULATE = "POST /test/calculate"
+PERFUMES = "GET /perfumes"
+# Etapas de /test/calculate que esperan por el bloqueo de escritura de SQLite
+WRITE_STAGES = ["persist", "commit"]
+PERFUMES_PAGE = 50
+# Archivo en el que los workers de uvicorn apuntan los errores "database is locked"
+LOCK_LOG_VARIABLE = "LOAD_TEST_LOCK_LOG"
+
+
+def seed_database(perfumes, seed):
+    """Crea el esquema y carga el catálogo sintético en la base de DATABASE_URL"""
+    from app.database import SessionLocal, engine, Base
+    
+    # Import ALL models to ensure they are registered with Base
+    from app.models.user import User
+    from app.models.test_result import TestResult, OlfactoryProfile
+    from app.models.perfume import Perfume, PerfumeVector, AffinityResult
+    from app.services.catalog_ingest import CatalogIngestor
+    
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        stats = CatalogIngestor.ingest(db, synthetic_perfumes(perfumes, seed), batch_size=1000, commit_size=10000)
+    finally:
+        db.close()
+    print(f"📦 {stats['inserted']} perfumes sintéticos cargados en {stats['seconds']:.1f}s")
+
+
+def read_answers(path):
+    """Lee conjuntos de respuestas desde un archivo JSONL"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Traffic:
+    """Genera las peticiones: endpoint, perfil de respuestas y página del catálogo"""
+    
+    def __init__(self, scenario, calculate_share, answers, perfumes, seed):
+        self.rng = random.Random(seed)
+        self.answers = answers
+        # Popularidad tipo Zipf: el perfil n-ésimo tiene peso 1/n
+        self.weights = [1 / rank for rank in range(1, len(answers) + 1)]
+        self.pages = max(1, perfumes // PERFUMES_PAGE)
+        self.calculate_share = {"calculate": 1.0, "perfumes": 0.0, "mixed": calculate_share}[scenario]
+    
+    def next(self):
+        if self.rng.random() < self.calculate_share:
+            answers = dict(self.rng.choices(self.answers, self.weights)[0])
+            # Cada petición es un usuario nuevo
+            answers["session_id"] = f"load-{uuid.uuid4()}"
+            return CALCULATE, {"method": "POST", "url": f"{API}/test/calculate", "json": answers}
+        skip = self.rng.randrange(self.pages) * PERFUMES_PAGE
+        return PERFUMES, {"method": "GET", "url": f"{API}/perfumes", "params": {"skip": skip, "limit": PERFUMES_PAGE}}
+
+
+class LevelStats:
+    """Resultados de un nivel de concurrencia"""
+    
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = Counter()
+        self.stages = {stage: [] for stage in WRITE_STAGES}
+    
+    def record(self, endpoint, seconds, status_code=None, error=None, server_timing=None):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.statuses.setdefault(endpoint, Counter())[status_code or "error"] += 1
+        if error is not None:
+            self.errors[error] += 1
+        for stage, milliseconds in parse_server_timing(server_timing).items():
+            if stage in self.stages:
+                self.stages[stage].append(milliseconds / 1000)
+
+
+def parse_server_timing(header):
+    """{etapa: milisegundos} de un header Server-Timing"""
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if params.startswith("dur="):
+            stages[name] = float(params[4:])
+    return stages
+
+
+def percentile(values, q):
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50_seconds": percentile(ordered, 0.50),
+        "p95_seconds": percentile(ordered, 0.95),
+        "p99_seconds": percentile(ordered, 0.99),
+        "max_seconds": ordered[-1] if ordered else None
+    }
+
+
+async def send(client, traffic, stats):
+    endpoint, request = traffic.next()
+    started = time.perf_counter()
+    try:
+        response = await client.request(**request)
+    except httpx.HTTPError as e:
+        stats.record(endpoint, time.perf_counter() - started, error=type(e).__name__)
+        return
+    stats.record(endpoint, time.perf_counter() - started, response.status_code,
+                 server_timing=response.headers.get("server-timing"))
+
+
+async def run_level(client, traffic, concurrency, requests, duration):
+    """Lanza requests peticiones (o durante duration segundos) con concurrency clientes"""
+    stats = LevelStats()
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+    
+    async def worker():
+        nonlocal issued
+        while (time.perf_counter() < deadline) if deadline else (issued < requests):
+            issued += 1
+            await send(client, traffic, stats)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+async def wait_ready(client, timeout):
+    """Espera a que /health/ready responda 200 (catálogo precargado)"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get(f"{API}/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"La API no estuvo lista en {timeout}s")
+
+
+class LockErrors:
+    """
+    Cuenta los errores "database is locked" de SQLAlchemy en este proceso.
+    
+    Con path, además apunta cada error en ese archivo (un byte por error),
+    que comparten todos los workers de uvicorn.
+    """
+    
+    def __init__(self, path=None):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        
+        self.count = 0
+        self.path = path
+        event.listen(Engine, "handle_error", self._handle_error)
+    
+    def _handle_error(self, context):
+        if "database is locked" in str(context.original_exception):
+            self.count += 1
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+
+
+class LockErrorLog:
+    """Errores "database is locked" apuntados por los workers de uvicorn"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    @property
+    def count(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+
+def uvicorn_app():
+    """App de NeuroScent para uvicorn --factory, con los bloqueos apuntados en LOAD_TEST_LOCK_LOG"""
+    from app.main import app
+    
+    LockErrors(os.environ[LOCK_LOG_VARIABLE])
+    return app
+
+
+def report(concurrency, stats, elapsed, lock_errors):
+    total = sum(len(latencies) for latencies in stats.latencies.values())
+    result = {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": elapsed,
+        "requests_per_second": total / elapsed if elapsed else 0.0,
+        "endpoints": {},
+        "write_stages": {stage: summarize(values) for stage, values in stats.stages.items()},
+        "lock_errors": lock_errors,
+        "client_errors": dict(stats.errors)
+    }
+    
+    print(f"\n🚦 Concurrencia {concurrency}: {total} peticiones en {elapsed:.1f}s → "
+          f"{result['requests_per_second']:.1f} req/s")
+    for endpoint, latencies in stats.latencies.items():
+        summary = summarize(latencies)
+        statuses = stats.statuses[endpoint]
+        failed = sum(count for status, count in statuses.items() if status == "error" or status >= 400)
+        summary.update(
+            requests_per_second=len(latencies) / elapsed if elapsed else 0.0,
+            error_rate=failed / len(latencies),
+            statuses={str(status): count for status, count in statuses.items()}
+        )
+        result["endpoints"][endpoint] = summary
+        print(f"   {endpoint:<20} {summary['requests_per_second']:8.1f} req/s  "
+              f"p50 {summary['p50_seconds'] * 1000:7.1f} ms  p95 {summary['p95_seconds'] * 1000:7.1f} ms  "
+              f"p99 {summary['p99_seconds'] * 1000:7.1f} ms  errores {summary['error_rate']:.1%}")
+    
+    for stage, summary in result["write_stages"].items():
+        if summary["count"]:
+            print(f"   🔒 etapa {stage:<8} p50 {summary['p50_seconds'] * 1000:7.1f} ms  "
+                  f"p95 {summary['p95_seconds'] * 1000:7.1f} ms  p99 {summary['p99_seconds'] * 1000:7.1f} ms")
+    if lock_errors is not None:
+        print(f"   🔒 errores 'database is locked': {lock_errors}")
+    if stats.errors:
+        print(f"   ⚠️  errores de cliente: {dict(stats.errors)}")
+    return result
+
+
+async def run_levels(client, traffic, args, lock_errors=None):
+    await wait_ready(client, args.ready_timeout)
+    if args.warmup:
+        await run_level(client, traffic, min(args.warmup, max(args.concurrency)), args.warmup, None)
+    
+    results = []
+    for concurrency in args.concurrency:
+        before = lock_errors.count if lock_errors is not None else None
+        stats, elapsed = await run_level(client, traffic, concurrency, args.requests, args.duration)
+        errors = lock_errors.count - before if lock_errors is not None else None
+        results.append(report(concurrency, stats, elapsed, errors))
+    return results
+
+
+async def in_process(traffic, args):
+    """Carga contra la app ASGI en este proceso, con su lifespan"""
+    from app.main import app
+    
+    lock_errors = LockErrors()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            return await run_levels(client, traffic, args, lock_errors)
+
+
+async def against_uvicorn(traffic, args, directory):
+    """Carga contra uvicorn en un subproceso que usa la base desechable"""
+    lock_log = os.path.join(directory, "lock_errors.log")
+    command = [
+        sys.executable, "-m", "uvicorn", "load_test:uvicorn_app", "--factory",
+        "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"
+    ]
+    server = subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, LOCK_LOG_VARIABLE: lock_log}
+    )
+    try:
+        limits = httpx.Limits(max_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=args.timeout, limits=limits) as client:
+            return await run_levels(client, traffic, args, LockErrorLog(lock_log))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de NeuroScent")
+    parser.add_argument("--perfumes", type=int, default=10000, help="Perfumes del catálogo sintético")
+    parser.add_argument("--scenario", choices=["calculate", "perfumes", "mixed"], default="mixed", help="Endpoints a cargar")
+    parser.add_argument("--calculate-share", type=float, default=0.5, help="Fracción de /test/calculate en el escenario mixed")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Niveles de concurrencia")
+    parser.add_argument("--requests", type=int, default=1000, help="Peticiones por nivel")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos por nivel (en lugar de --requests)")
+    parser.add_argument("--warmup", type=int, default=20, help="Peticiones de calentamiento no medidas")
+    parser.add_argument("--profiles", type=int, default=500, help="Perfiles de respuestas distintos")
+    parser.add_argument("--answers", default=None, help="Archivo .jsonl de respuestas (en lugar de las sintéticas)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos y del tráfico")
+    parser.add_argument("--async-db", action="store_true", help="Usa sesiones asíncronas (sqlite+aiosqlite)")
+    parser.add_argument("--sqlite-profile", action="store_true", help="Activa SQLITE_PRODUCTION_PROFILE (WAL, busy_timeout)")
+    parser.add_argument("--uvicorn", action="store_true", help="Carga contra uvicorn en un subproceso")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto de uvicorn")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición en segundos")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Espera máxima a /health/ready")
+    parser.add_argument("--output", default=None, help="Guarda los resultados en JSON")
+    parser.add_argument("--keep", action="store_true", help="Conserva la base de datos desechable")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("   NEUROSCENT - PRUEBA DE CARGA")
+    print("=" * 60)
+    
+    # La configuración de la app se lee al importarla: la base desechable
+    # tiene que estar en el entorno antes de cualquier import de app.*
+    directory = tempfile.mkdtemp(prefix="neuroscent-load-")
+    path = os.path.join(directory, "loadtest.db")
+    os.environ["DATABASE_URL"] = f"sqlite{'+aiosqlite' if args.async_db else ''}:///{path}"
+    os.environ["DEBUG"] = "False"
+    if args.sqlite_profile:
+        os.environ["SQLITE_PRODUCTION_PROFILE"] = "True"
+    print(f"🗄️  Base de datos desechable: {path}")
+    
+    try:
+        seed_database(args.perfumes, args.seed)
+        answers = read_answers(args.answers) if args.answers else synthetic_answers(args.profiles, args.seed)
+        traffic = Traffic(args.scenario, args.calculate_share, answers, args.perfumes, args.seed)
+        
+        results = asyncio.run(against_uvicorn(traffic, args, directory) if args.uvicorn else in_process(traffic, args))
+        
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"arguments": vars(args), "levels": results}, f, indent=2)
+            print(f"\n💾 Resultados guardados en {args.output}")
+    finally:
+        if args.keep:
+            print(f"\n🗄️  Base de datos conservada en {path}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
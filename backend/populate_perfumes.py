@@ -1,16 +1,29 @@
 """
 Script para poblar la base de datos de NeuroScent con perfumes árabes.
 Ejecutar después de tener la base de datos configurada.
+
+Sin argumentos carga PERFUMES_DATA. Con --file carga un catálogo CSV o JSONL
+en streaming (por lotes, memoria constante), insertando los perfumes nuevos y
+actualizando los existentes (mismo nombre y marca).
+
+Con --sync el archivo se trata como el catálogo completo: solo se escriben los
+perfumes cuyo contenido cambió y se desactivan los que ya no aparecen.
+
+Uso:
+    python populate_perfumes.py
+    python populate_perfumes.py --file catalogo.jsonl --batch-size 1000 --commit-size 10000
+    python populate_perfumes.py --file catalogo.jsonl --sync
 """
 
-from sqlalchemy.orm import Session
+import argparse
+
 from app.database import SessionLocal, engine, Base
 
 # Import ALL models to ensure they are registered with Base
 from app.models.user import User
 from app.models.test_result import TestResult, OlfactoryProfile
 from app.models.perfume import Perfume, PerfumeVector, AffinityResult
-import uuid
+from app.services.catalog_ingest import CatalogIngestor
 
 # Crear todas las tablas si no existen
 Base.metadata.create_all(bind=engine)
@@ -620,65 +633,45 @@ PERFUMES_DATA = [
 ]
 
 
-def populate_database():
-    """Pobla la base de datos con perfumes árabes"""
+def report_progress(stats):
+    """Muestra el avance y el rendimiento tras cada commit"""
+    print(f"   💾 {stats['read']} registros procesados ({stats['rate']:.0f} registros/s)")
+
+
+def populate_database(records=None, batch_size=500, commit_size=5000, sync=False):
+    """Pobla la base de datos con perfumes árabes o con un catálogo en streaming"""
     db = SessionLocal()
     
     try:
         print("🚀 Iniciando población de base de datos...")
-        print(f"📦 Insertando {len(PERFUMES_DATA)} perfumes...")
+        if records is None:
+            print(f"📦 Insertando {len(PERFUMES_DATA)} perfumes...")
+            records = PERFUMES_DATA
         
-        inserted_count = 0
+        stats = CatalogIngestor.ingest(
+            db,
+            records,
+            batch_size=batch_size,
+            commit_size=commit_size,
+            on_commit=report_progress,
+            sync=sync
+        )
         
-        for perfume_data in PERFUMES_DATA:
-            # Verificar si el perfume ya existe
-            existing = db.query(Perfume).filter(
-                Perfume.name == perfume_data["name"],
-                Perfume.brand == perfume_data["brand"]
-            ).first()
-            
-            if existing:
-                print(f"⏭️  '{perfume_data['name']}' ya existe, saltando...")
-                continue
-            
-            # Crear perfume
-            perfume = Perfume(
-                name=perfume_data["name"],
-                brand=perfume_data["brand"],
-                description=perfume_data["description"],
-                is_active=True
-            )
-            
-            db.add(perfume)
-            db.flush()  # Para obtener el ID
-            
-            # Crear vector del perfume
-            vector_data = perfume_data["vector"]
-            perfume_vector = PerfumeVector(
-                perfume_id=perfume.id,
-                intensity=vector_data["intensity"],
-                citrus=vector_data["citrus"],
-                floral=vector_data["floral"],
-                woody=vector_data["woody"],
-                sweet=vector_data["sweet"],
-                spicy=vector_data["spicy"],
-                green=vector_data["green"],
-                aquatic=vector_data["aquatic"],
-                suitable_occasions=vector_data["suitable_occasions"],
-                suitable_times=vector_data["suitable_times"],
-                season=vector_data["season"],
-                longevity=vector_data["longevity"],
-                concentration=vector_data["concentration"]
-            )
-            
-            db.add(perfume_vector)
-            inserted_count += 1
-            print(f"✅ '{perfume_data['name']}' - {perfume_data['brand']}")
+        for number, error in stats["errors"]:
+            print(f"⚠️  Registro {number} inválido: {error}")
         
-        db.commit()
-        print(f"\n🎉 ¡Completado! {inserted_count} perfumes insertados exitosamente.")
+        print(f"\n🎉 ¡Completado! {stats['inserted']} perfumes insertados, {stats['updated']} actualizados.")
+        if sync:
+            print(f"🔁 {stats['unchanged']} sin cambios, {stats['deactivated']} desactivados.")
+        if stats["invalid"]:
+            print(f"⚠️  {stats['invalid']} registros inválidos omitidos")
+            if sync:
+                print("⚠️  Catálogo incompleto: no se desactivó ningún perfume")
+        if stats["version"] is not None:
+            print(f"🏷️  Versión del catálogo: {stats['version']}")
+        print(f"⏱️  {stats['read']} registros en {stats['seconds']:.2f}s ({stats['rate']:.0f} registros/s)")
         print(f"📊 Total de perfumes en base de datos: {db.query(Perfume).count()}")
-        
+    
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         db.rollback()
@@ -688,7 +681,15 @@ def populate_database():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pobla el catálogo de perfumes")
+    parser.add_argument("--file", default=None, help="Catálogo .csv o .jsonl (por defecto PERFUMES_DATA)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Registros por sentencia")
+    parser.add_argument("--commit-size", type=int, default=5000, help="Registros por transacción")
+    parser.add_argument("--sync", action="store_true", help="Sincroniza el catálogo completo (desactiva los ausentes)")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("   NEUROSCENT - POBLACIÓN DE PERFUMES ÁRABES")
     print("=" * 60)
-    populate_database()
+    records = CatalogIngestor.read_records(args.file) if args.file else None
+    populate_database(records, args.batch_size, args.commit_size, args.sync)
@@ -0,0 +1,125 @@
+"""
+Generador de datos sintéticos reproducibles para NeuroScent.
+
+Genera catálogos de perfumes (en el formato JSONL que acepta
+populate_perfumes.py --file) y respuestas de test aleatorias con la misma
+distribución de opciones que el cuestionario. La misma semilla produce
+siempre los mismos datos; lo usan benchmark_suite.py y load_test.py.
+
+Uso:
+    python synthetic_data.py --perfumes 100000 --output catalogo.jsonl
+    python synthetic_data.py --answers 1000 --output respuestas.jsonl --seed 7
+"""
+
+import argparse
+import json
+import random
+import uuid
+from collections import namedtuple
+
+from app.services.scoring_catalog import ScoringCatalog
+
+GENDERS = ["male", "female", "unisex"]
+# Peso de cada género en el catálogo (la mayoría de perfumes tiene género)
+GENDER_WEIGHTS = [0.4, 0.4, 0.2]
+FAMILIES = ScoringCatalog.FAMILIES
+EMOTIONS = ["freshness", "elegance", "sensuality", "calm", "joy", "confidence"]
+TIMES = ["morning", "afternoon", "night", "anytime"]
+OCCASIONS = ["work", "daily", "special_events", "romantic", "sports", "any"]
+SEASONS = ["spring", "summer", "autumn", "winter", "all_year"]
+CONCENTRATIONS = ["eau_de_toilette", "eau_de_parfum", "parfum"]
+
+# Filas con las columnas que ScoringCatalog.from_rows lee de PerfumeVector
+CatalogRow = namedtuple("CatalogRow", ["perfume_id", "gender", *ScoringCatalog.FEATURES,
+                                       "suitable_occasions", "suitable_times", "season", "longevity"])
+
+
+def synthetic_perfumes(count, seed=0):
+    """Genera count registros de perfume planos (nombre, marca, vector y metadatos)"""
+    rng = random.Random(seed)
+    for i in range(count):
+        record = {
+            "name": f"Sintético {i:07d}",
+            "brand": f"Marca {rng.randrange(500):03d}",
+            "description": "Perfume sintético para pruebas de rendimiento.",
+            "gender": rng.choices(GENDERS, GENDER_WEIGHTS)[0],
+            "intensity": round(rng.uniform(0.1, 1.0), 2)
+        }
+        # Dos o tres familias dominantes, el resto en segundo plano
+        dominant = set(rng.sample(FAMILIES, rng.randint(2, 3)))
+        for family in FAMILIES:
+            record[family] = round(rng.uniform(0.5, 1.0) if family in dominant else rng.uniform(0.0, 0.3), 2)
+        record["suitable_occasions"] = rng.sample(OCCASIONS, rng.randint(1, 3))
+        record["suitable_times"] = rng.sample(TIMES[:3], rng.randint(1, 3))
+        record["season"] = rng.choice(SEASONS)
+        record["longevity"] = round(rng.uniform(0.2, 1.0), 2)
+        record["concentration"] = rng.choice(CONCENTRATIONS)
+        yield record
+
+
+def synthetic_catalog(count, seed=0):
+    """ScoringCatalog de count perfumes sintéticos, con ids UUID reproducibles"""
+    rng = random.Random(seed)
+    rows = (
+        CatalogRow(
+            perfume_id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            gender=record["gender"],
+            **{feature: record[feature] for feature in ScoringCatalog.FEATURES},
+            suitable_occasions=record["suitable_occasions"],
+            suitable_times=record["suitable_times"],
+            season=record["season"],
+            longevity=record["longevity"]
+        )
+        for record in synthetic_perfumes(count, seed)
+    )
+    return ScoringCatalog.from_rows(rows)
+
+
+def synthetic_answers(count, seed=0):
+    """Genera count respuestas de test válidas para /test/calculate"""
+    rng = random.Random(seed)
+    answers = []
+    for i in range(count):
+        preferred = rng.sample(FAMILIES, rng.randint(1, 3))
+        remaining = [family for family in FAMILIES if family not in preferred]
+        answers.append({
+            "q0_gender": rng.choice(["male", "female"]),
+            "q1_intensity": rng.randint(1, 5),
+            "q2_preferred_families": preferred,
+            "q3_rejected_families": rng.sample(remaining, rng.randint(0, 2)),
+            "q4_emotion": rng.choice(EMOTIONS),
+            "q5_time_of_day": rng.sample(TIMES, rng.randint(1, 2)),
+            "q6_occasions": rng.sample(OCCASIONS, rng.randint(1, 3)),
+            "q7_season": rng.choice(SEASONS),
+            "q8_longevity": rng.randint(1, 5),
+            "q9_concentration": rng.choice(CONCENTRATIONS + [None]),
+            "session_id": f"synthetic-{seed}-{i}"
+        })
+    return answers
+
+
+def write_jsonl(records, output):
+    """Escribe los registros en un archivo JSONL y devuelve cuántos se escribieron"""
+    written = 0
+    with open(output, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos reproducibles")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--perfumes", type=int, help="Número de perfumes del catálogo")
+    group.add_argument("--answers", type=int, help="Número de respuestas de test")
+    parser.add_argument("--output", required=True, help="Archivo .jsonl de salida")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla aleatoria")
+    args = parser.parse_args()
+    
+    if args.perfumes is not None:
+        written = write_jsonl(synthetic_perfumes(args.perfumes, args.seed), args.output)
+        print(f"✅ {written} perfumes sintéticos → {args.output}")
+    else:
+        written = write_jsonl(synthetic_answers(args.answers, args.seed), args.output)
+        print(f"✅ {written} respuestas sintéticas → {args.output}")
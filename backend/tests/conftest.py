@@ -0,0 +1,79 @@
+"""
+Shared fixtures for the API and database tests.
+
+The app reads its settings when app.config is first imported, so the
+throwaway database is put in the environment here, before any app module
+is imported by a test.
+"""
+import os
+import shutil
+import tempfile
+
+_directory = tempfile.mkdtemp(prefix="neuroscent-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ["DEBUG"] = "False"
+os.environ["WARMUP_ENABLED"] = "False"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine
+
+# Import ALL models to ensure they are registered with Base
+from app.models.user import User
+from app.models.test_result import TestResult, OlfactoryProfile
+from app.models.perfume import Perfume, PerfumeVector, AffinityResult, AffinityRanking, CatalogChange, CatalogVersion
+from app.services.catalog_ingest import CatalogIngestor
+from synthetic_data import synthetic_answers, synthetic_perfumes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def tmp_dir():
+    """Directory of the throwaway database, removed after the session"""
+    return _directory
+
+
+@pytest.fixture(scope="session")
+def client():
+    """API client; the lifespan creates the schema"""
+    from app.main import app
+    
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def seed_catalog(count, seed=0):
+    """Ingest count synthetic perfumes; a new seed adds perfumes with new names"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        records = (
+            dict(record, name=f"{record['name']} s{seed}")
+            for record in synthetic_perfumes(count, seed)
+        )
+        return CatalogIngestor.ingest(session, records)
+    finally:
+        session.close()
+
+
+def make_answers(index, gender="male"):
+    """Valid /test/calculate answers with a session of their own"""
+    answers = synthetic_answers(1, seed=index)[0]
+    answers["q0_gender"] = gender
+    return answers
@@ -0,0 +1,57 @@
+"""Whole-catalog scoring gives the same scores and order as per-pair scoring"""
+import random
+import uuid
+
+from app.models.perfume import Perfume, PerfumeVector
+from app.models.test_result import OlfactoryProfile
+from app.services.affinity_engine import AffinityEngine
+from app.services.catalog_ingest import CatalogIngestor
+from app.services.scoring_catalog import ScoringCatalog
+from app.services.test_engine import TestEngine
+from synthetic_data import synthetic_answers, synthetic_perfumes
+
+
+def build_pairs(count, seed):
+    """(perfume, vector) pairs with the edge cases the array encoding has to handle"""
+    records = list(synthetic_perfumes(count, seed))
+    records[0]["season"] = None
+    records[1]["suitable_occasions"] = []
+    records[2]["suitable_times"] = []
+    rng = random.Random(seed)
+    for feature in ScoringCatalog.FEATURES:
+        records[3][feature] = rng.uniform(0.1, 1.0)
+    records[3]["longevity"] = rng.uniform(0.2, 1.0)
+    # Identical perfumes under other ids: equal scores, ordered by id
+    records.extend(dict(record) for record in records[:10])
+    
+    pairs = []
+    for record in records:
+        perfume_data, vector_data = CatalogIngestor.validate(record)
+        perfume_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        pairs.append((Perfume(id=perfume_id, **perfume_data), PerfumeVector(perfume_id=perfume_id, **vector_data)))
+    return pairs
+
+
+def test_score_catalog_matches_calculate_affinity():
+    pairs = build_pairs(300, seed=11)
+    catalog = ScoringCatalog.from_rows(vector for _, vector in pairs)
+    k = 25
+    tied = 0
+    
+    for answers in synthetic_answers(40, seed=11):
+        profile = OlfactoryProfile(**TestEngine.build_profile(answers))
+        expected = {
+            perfume.id: AffinityEngine.calculate_affinity(profile, perfume, vector)[0]
+            for perfume, vector in pairs
+        }
+        
+        scores = AffinityEngine.score_catalog(profile, catalog)
+        assert {perfume_id: scores[i].item() for i, perfume_id in enumerate(catalog.ids)} == expected
+        
+        top = AffinityEngine.rank(scores, catalog.id_ranks, k)
+        expected_top = sorted(expected, key=lambda perfume_id: (-expected[perfume_id], perfume_id))[:k]
+        assert [catalog.ids[i] for i in top.tolist()] == expected_top
+        tied += k - len({expected[perfume_id] for perfume_id in expected_top})
+    
+    # The duplicated perfumes make some top-k cuts depend on the id tie-break
+    assert tied > 0
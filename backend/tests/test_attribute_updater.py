@@ -0,0 +1,37 @@
+"""Bulk attribute updates recover from a failed run on the same connection"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.perfume import Perfume
+from app.services.attribute_updater import AttributeUpdater
+from app.services.catalog_ingest import CatalogIngestor
+from synthetic_data import synthetic_perfumes
+
+
+def test_failed_run_does_not_break_the_next_one(tmp_path):
+    # One pooled connection, so both runs use the same SQLite connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'attributes.db'}", pool_size=1, max_overflow=0)
+    Session = sessionmaker(autoflush=False, bind=engine)
+    try:
+        Base.metadata.create_all(bind=engine)
+        records = list(synthetic_perfumes(10, seed=80))
+        with Session() as session:
+            CatalogIngestor.ingest(session, records)
+        
+        def failing():
+            yield {"name": records[0]["name"], "gender": "female"}
+            raise RuntimeError("feed interrupted")
+        
+        with Session() as session:
+            with pytest.raises(RuntimeError):
+                AttributeUpdater.apply(session, failing(), ["gender"])
+        
+        updates = [{"name": record["name"], "gender": "unisex"} for record in records]
+        with Session() as session:
+            stats = AttributeUpdater.apply(session, updates, ["gender"])
+            assert stats["staged"] == len(records)
+            assert session.query(Perfume).filter(Perfume.gender != "unisex").count() == 0
+    finally:
+        engine.dispose()
@@ -0,0 +1,39 @@
+"""/test/calculate issues the same number of statements whatever the catalog size"""
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.perfume import PerfumeVector
+from app.services.query_tracker import query_budget, track_queries
+from conftest import make_answers, seed_catalog
+
+
+def calculate(client, index):
+    response = client.post("/api/v1/test/calculate", json=make_answers(index))
+    assert response.status_code == 200, response.text
+    return response
+
+
+def statements(client, index):
+    """Statements of one calculation once the catalog cache is current"""
+    calculate(client, index)
+    with track_queries() as stats:
+        calculate(client, index + 1)
+    return stats.count
+
+
+@pytest.mark.parametrize("seed, mode", [(30, "bulk"), (31, "top_k"), (32, "compact")])
+def test_statement_count_does_not_grow_with_the_catalog(client, monkeypatch, seed, mode):
+    monkeypatch.setattr(settings, "AFFINITY_PERSISTENCE_MODE", mode)
+    # Every request scores the catalog instead of reusing a cached ranking
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", False)
+    
+    seed_catalog(30, seed=seed)
+    small = statements(client, seed * 100)
+    
+    with SessionLocal() as session:
+        size = session.query(PerfumeVector).count()
+    seed_catalog(max(1000, size), seed=seed + 100)
+    calculate(client, seed * 100 + 10)
+    with query_budget(small):
+        calculate(client, seed * 100 + 11)
@@ -0,0 +1,82 @@
+"""The catalog cache follows committed catalog writes"""
+from app.database import SessionLocal
+from app.models.perfume import PerfumeVector
+from app.services.catalog_cache import CatalogCache, catalog_cache
+from app.services.catalog_ingest import CatalogIngestor
+from conftest import seed_catalog
+from synthetic_data import synthetic_perfumes
+
+
+def citrus_of(cache, perfume_id):
+    with SessionLocal() as session:
+        catalog = cache.get(session)
+    return float(catalog.features[catalog.position(perfume_id), 1])
+
+
+def first_vector_id():
+    with SessionLocal() as session:
+        return session.query(PerfumeVector.perfume_id).order_by(PerfumeVector.perfume_id).limit(1).scalar()
+
+
+def test_writes_within_one_second_are_seen():
+    seed_catalog(20, seed=1)
+    cache = CatalogCache()
+    perfume_id = first_vector_id()
+    
+    # Same row count, and timestamps with one-second resolution
+    for citrus in (0.21, 0.22, 0.23):
+        with SessionLocal() as session:
+            session.query(PerfumeVector).filter(PerfumeVector.perfume_id == perfume_id).one().citrus = citrus
+            session.commit()
+        assert citrus_of(cache, perfume_id) == citrus
+
+
+def test_bulk_writes_bump_the_version():
+    seed_catalog(20, seed=2)
+    cache = CatalogCache()
+    records = [dict(record, name=f"{record['name']} s2") for record in synthetic_perfumes(20, 2)]
+    with SessionLocal() as session:
+        before = CatalogCache.data_version(session)
+        cache.get(session)
+    
+    records[0]["citrus"] = 0.05 if records[0]["citrus"] != 0.05 else 0.06
+    with SessionLocal() as session:
+        CatalogIngestor.ingest(session, records, sync=False)
+        assert CatalogCache.data_version(session) > before
+        perfume_id = session.query(PerfumeVector.perfume_id).join(PerfumeVector.perfume).filter_by(
+            name=records[0]["name"]
+        ).scalar()
+    assert citrus_of(cache, perfume_id) == records[0]["citrus"]
+
+
+def test_uncommitted_writes_are_not_cached():
+    seed_catalog(20, seed=3)
+    cache = CatalogCache()
+    perfume_id = first_vector_id()
+    committed = citrus_of(cache, perfume_id)
+    
+    writer = SessionLocal()
+    try:
+        writer.query(PerfumeVector).filter(PerfumeVector.perfume_id == perfume_id).one().citrus = 0.31
+        writer.flush()
+        # A reader rebuilding now sees the committed catalog and caches it
+        # under the committed version, not the pending one
+        assert citrus_of(cache, perfume_id) == committed
+        writer.commit()
+    finally:
+        writer.close()
+    assert citrus_of(cache, perfume_id) == 0.31
+
+
+def test_commit_makes_the_shared_cache_recheck():
+    seed_catalog(20, seed=4)
+    perfume_id = first_vector_id()
+    catalog_cache.check_interval = 3600.0
+    try:
+        assert citrus_of(catalog_cache, perfume_id) is not None
+        with SessionLocal() as session:
+            session.query(PerfumeVector).filter(PerfumeVector.perfume_id == perfume_id).one().citrus = 0.41
+            session.commit()
+        assert citrus_of(catalog_cache, perfume_id) == 0.41
+    finally:
+        catalog_cache.check_interval = 0.0
@@ -0,0 +1,59 @@
+"""Catalog ingestion records a change set with every batch it writes"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.perfume import CatalogChange, Perfume
+from app.services.catalog_cache import CatalogCache
+from app.services.catalog_ingest import CatalogIngestor, SeenIds
+from synthetic_data import synthetic_perfumes
+
+
+def test_every_commit_is_explained_by_change_sets(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Session = sessionmaker(autoflush=False, bind=engine)
+    try:
+        Base.metadata.create_all(bind=engine)
+        records = list(synthetic_perfumes(300, seed=90))
+        with Session() as session:
+            CatalogIngestor.ingest(session, records[:100])
+        
+        cache = CatalogCache()
+        reader = Session()
+        cache.get(reader)
+        reader.commit()
+        
+        def check(stats):
+            # A reader between commits patches the catalog instead of rebuilding
+            catalog = cache.get(reader)
+            assert len(catalog) == len(CatalogCache.load_catalog(reader))
+            reader.commit()
+        
+        for record in records[:50]:
+            record["citrus"] = 0.01 if record["citrus"] != 0.01 else 0.02
+        with Session() as session:
+            stats = CatalogIngestor.ingest(session, records[:250], batch_size=20, commit_size=60, on_commit=check, sync=True)
+            assert stats["inserted"] == 150 and stats["updated"] == 50 and stats["unchanged"] == 50
+            assert stats["version"] == session.query(CatalogChange).count()
+        assert cache.stats()["rebuilds"] == 1
+        assert cache.stats()["incremental_refreshes"] >= 4
+        
+        with Session() as session:
+            stats = CatalogIngestor.ingest(session, records[:200], sync=True)
+            assert stats["deactivated"] == 50
+            assert session.query(Perfume).filter(Perfume.is_active == True).count() == 200
+        catalog = cache.get(reader)
+        assert catalog.fingerprint == CatalogCache.load_catalog(reader).fingerprint
+        assert cache.stats()["rebuilds"] == 1
+        reader.close()
+    finally:
+        engine.dispose()
+
+
+def test_seen_ids():
+    seen = SeenIds()
+    try:
+        seen.update(["a", "b"], [], ["c", "a"])
+        assert seen.missing(["d", "a", "e", "c"]) == ["d", "e"]
+    finally:
+        seen.close()
@@ -0,0 +1,32 @@
+"""Snapshot catalogs serve gender subsets as slices of the mapped arrays"""
+import numpy as np
+
+from app.models.test_result import OlfactoryProfile
+from app.services.affinity_engine import AffinityEngine
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.test_engine import TestEngine
+from synthetic_data import synthetic_answers, synthetic_catalog
+
+
+def ranking(catalog, profile, k=20):
+    scores = AffinityEngine.score_catalog(profile, catalog)
+    return [(catalog.ids[i], scores[i].item()) for i in AffinityEngine.rank(scores, catalog.id_ranks, k).tolist()]
+
+
+def test_gender_subsets_are_views(tmp_path):
+    catalog = synthetic_catalog(2000, seed=5)
+    mapped = CatalogSnapshot.load(CatalogSnapshot.save(catalog, str(tmp_path), [1, 1]))
+    assert mapped.fingerprint == catalog.fingerprint
+    
+    for answers in synthetic_answers(6, seed=5):
+        genders = [answers["q0_gender"], "unisex"]
+        subset = mapped.for_genders(genders)
+        for array in (subset.ids, subset.features, subset.gender_codes, subset.id_ranks):
+            assert isinstance(array, np.memmap)
+        assert len(subset) == len(catalog.for_genders(genders))
+        
+        profile = OlfactoryProfile(**TestEngine.build_profile(answers))
+        assert ranking(subset, profile) == ranking(catalog.for_genders(genders), profile)
+    
+    # Gender sets that are not one range still work, as copies
+    assert len(mapped.for_genders(["male", "female"])) == len(catalog.for_genders(["male", "female"]))
@@ -0,0 +1,33 @@
+"""Migrations bring the committed pre-migration database up to the models"""
+import os
+import shutil
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect
+
+from app.database import Base
+from conftest import BACKEND_DIR
+
+
+def test_upgrade_head_matches_models(tmp_path):
+    # neuroscent.db was created by the original create_all, before any migration
+    path = tmp_path / "migrated.db"
+    shutil.copy(os.path.join(BACKEND_DIR, "neuroscent.db"), path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True
+    )
+    
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        inspector = inspect(engine)
+        assert set(Base.metadata.tables) <= set(inspector.get_table_names())
+        for name, table in Base.metadata.tables.items():
+            columns = {column["name"] for column in inspector.get_columns(name)}
+            assert {column.name for column in table.columns} <= columns, name
+            indexes = {index["name"] for index in inspector.get_indexes(name)}
+            assert {index.name for index in table.indexes} <= indexes, name
+    finally:
+        engine.dispose()
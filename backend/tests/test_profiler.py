@@ -0,0 +1,32 @@
+"""Profiling triggers and admin endpoints require the configured token"""
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.routers.admin_router import require_profiling_access
+from app.services.profiler import RequestProfiler
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    return RequestProfiler(min_interval=0.0, max_profiles=5)
+
+
+def test_without_token_nothing_is_accepted(profiler, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", None)
+    for value in ("1", "", "change-me"):
+        assert not RequestProfiler.authorized(value)
+        assert profiler.start("calculate", value) is None
+        with pytest.raises(HTTPException) as error:
+            require_profiling_access(value)
+        assert error.value.status_code == 403
+    assert profiler.stats()["rejected"] == 3
+
+
+def test_token_is_required(profiler, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "s3cret")
+    assert profiler.start("calculate", "1") is None
+    assert profiler.start("calculate", "s3cre") is None
+    assert profiler.start("calculate", "s3cret") is not None
+    require_profiling_access("s3cret")
@@ -0,0 +1,76 @@
+"""Statement budgets per endpoint; an N+1 regression exceeds them"""
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.perfume import Perfume, PerfumeVector
+from app.services.query_tracker import QueryBudgetExceeded, query_budget
+from conftest import make_answers, seed_catalog
+
+# A new user's /test/calculate: user lookup, catalog fingerprint, served
+# perfumes, then one INSERT each for the user, test result, profile and
+# results (or ranking), whatever the persistence mode
+CALCULATE_BUDGET = 7
+
+
+@pytest.fixture(scope="module", autouse=True)
+def catalog():
+    seed_catalog(200, seed=40)
+
+
+def calculate(client, index):
+    response = client.post("/api/v1/test/calculate", json=make_answers(index))
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+@pytest.mark.parametrize("index, mode", [(4000, "bulk"), (4010, "top_k"), (4020, "compact")])
+def test_calculate(client, monkeypatch, index, mode):
+    monkeypatch.setattr(settings, "AFFINITY_PERSISTENCE_MODE", mode)
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", False)
+    calculate(client, index)
+    
+    with query_budget(CALCULATE_BUDGET, max_repeats=1):
+        calculate(client, index + 1)
+
+
+@pytest.mark.parametrize("index, mode, budget", [(4100, "bulk", 2), (4110, "compact", 4)])
+def test_get_test_result(client, monkeypatch, index, mode, budget):
+    monkeypatch.setattr(settings, "AFFINITY_PERSISTENCE_MODE", mode)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    test_id = calculate(client, index)["test_id"]
+    
+    # Test result with its profile, then the top results with their perfumes
+    # and vectors (compact rankings load the served perfumes separately)
+    with query_budget(budget, max_repeats=1):
+        assert client.get(f"/api/v1/test/{test_id}").status_code == 200
+
+
+def test_list_perfumes(client):
+    with query_budget(1):
+        response = client.get("/api/v1/perfumes", params={"limit": 100})
+    assert len(response.json()) == 100
+
+
+def test_get_perfume(client):
+    with SessionLocal() as session:
+        perfume_id = session.query(PerfumeVector.perfume_id).limit(1).scalar()
+    with query_budget(2, max_repeats=1):
+        assert client.get(f"/api/v1/perfumes/{perfume_id}").status_code == 200
+
+
+def test_explanation(client):
+    data = calculate(client, 4200)
+    perfume_id = data["results"][0]["perfume"]["id"]
+    with query_budget(2, max_repeats=1):
+        response = client.get(f"/api/v1/profiles/{data['profile_id']}/perfumes/{perfume_id}/explanation")
+    assert response.status_code == 200
+
+
+def test_budget_catches_n_plus_one():
+    with SessionLocal() as session:
+        perfumes = session.query(Perfume).limit(10).all()
+        with pytest.raises(QueryBudgetExceeded, match="10x"):
+            with query_budget(20, max_repeats=1):
+                for perfume in perfumes:
+                    session.query(PerfumeVector).filter(PerfumeVector.perfume_id == perfume.id).first()
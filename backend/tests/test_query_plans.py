@@ -0,0 +1,78 @@
+"""The hot queries search their indexes instead of scanning the table"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, select
+
+from app.config import settings
+from app.database import engine
+from app.models.perfume import Perfume
+from conftest import make_answers, seed_catalog
+
+
+@pytest.fixture(scope="module", autouse=True)
+def catalog():
+    seed_catalog(200, seed=60)
+
+
+@contextmanager
+def captured_selects():
+    """(statement, parameters) of the SELECTs executed while the block runs"""
+    selects = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append((statement, parameters))
+    
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield selects
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(statement, parameters=()):
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters)).all()
+    return [row[-1] for row in rows]
+
+
+def plan_of(selects, table):
+    """Query plan of the captured SELECT reading from table"""
+    matching = [(statement, parameters) for statement, parameters in selects if f"FROM {table}" in statement]
+    assert matching, f"no SELECT from {table} was executed"
+    return query_plan(*matching[0])
+
+
+def assert_searches(plan, table, index):
+    assert any(line.startswith(f"SEARCH {table} USING") and index in line for line in plan), plan
+    assert not any(line.startswith(f"SCAN {table}") for line in plan), plan
+
+
+def test_active_catalog_by_gender():
+    statement = select(Perfume.id).where(Perfume.is_active == True, Perfume.gender == "male")
+    compiled = statement.compile(engine)
+    plan = query_plan(str(compiled), [compiled.params[name] for name in compiled.positiontup])
+    assert_searches(plan, "perfumes", "ix_perfumes_active_gender")
+
+
+@pytest.fixture
+def stored_result(client, monkeypatch):
+    monkeypatch.setattr(settings, "AFFINITY_PERSISTENCE_MODE", "top_k")
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    response = client.post("/api/v1/test/calculate", json=make_answers(6000))
+    assert response.status_code == 200, response.text
+    return response.json()["data"]["test_id"]
+
+
+def test_result_reads(client, stored_result):
+    with captured_selects() as selects:
+        assert client.get(f"/api/v1/test/{stored_result}").status_code == 200
+    
+    # Profile of a test result
+    assert_searches(plan_of(selects, "test_results"), "olfactory_profiles", "ix_olfactory_profiles_test_result_id")
+    
+    # Best results of a profile, read in index order without a sort
+    plan = plan_of(selects, "affinity_results")
+    assert_searches(plan, "affinity_results", "ix_affinity_results_profile_score")
+    assert not any("TEMP B-TREE" in line for line in plan), plan
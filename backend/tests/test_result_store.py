@@ -0,0 +1,29 @@
+"""Stored results read back in the order AffinityEngine.rank produces"""
+import numpy as np
+
+from app.models.perfume import Perfume
+from app.models.user import User
+from app.models import test_result as models
+from app.services.affinity_engine import AffinityEngine
+from app.services.result_store import ResultStore
+from app.services.test_engine import TestEngine
+from conftest import make_answers, seed_catalog
+
+
+def test_top_results_break_ties_by_perfume_id(db):
+    seed_catalog(20, seed=70)
+    perfume_ids = db.query(Perfume.id).limit(6).all()
+    perfume_ids = [perfume_id for (perfume_id,) in perfume_ids]
+    scores = np.array([70.0, 90.0, 90.0, 80.0, 90.0, 90.0])
+    
+    answers = make_answers(7000)
+    test_result = models.TestResult(user=User(session_id=answers["session_id"]), answers=answers)
+    profile = models.OlfactoryProfile(test_result=test_result, **TestEngine.build_profile(answers))
+    db.add_all([test_result, profile])
+    # Stored in reverse id order, so insertion order cannot pass for the tie-break
+    ranking = sorted(zip(perfume_ids, scores.tolist()), reverse=True)
+    ResultStore.save_rows(db, profile, ranking, {})
+    db.commit()
+    
+    expected = [perfume_ids[i] for i in AffinityEngine.rank(scores, np.argsort(np.argsort(perfume_ids)), 4)]
+    assert [result["perfume"].id for result in ResultStore.top_results(db, profile, limit=4)] == expected
@@ -0,0 +1,75 @@
+"""Concurrent writers under the SQLite production profile (WAL, busy_timeout)"""
+import threading
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.database import Base, _apply_sqlite_profile
+from app.models.user import User
+from app.models import test_result as models
+from app.models.perfume import AffinityResult, Perfume
+from app.services.catalog_ingest import CatalogIngestor
+from app.services.result_store import ResultStore
+from app.services.test_engine import TestEngine
+from synthetic_data import synthetic_answers, synthetic_perfumes
+
+WRITERS = 8
+REQUESTS_PER_WRITER = 15
+PERFUMES = 200
+
+
+def test_concurrent_writers_never_see_database_is_locked(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stress.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=WRITERS
+    )
+    _apply_sqlite_profile(engine)
+    lock_errors = []
+    event.listen(engine, "handle_error", lambda context: lock_errors.append(str(context.original_exception)))
+    Session = sessionmaker(autoflush=False, bind=engine)
+    
+    try:
+        Base.metadata.create_all(bind=engine)
+        with Session() as session:
+            assert session.connection().exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            CatalogIngestor.ingest(session, synthetic_perfumes(PERFUMES, seed=50))
+            perfume_ids = session.scalars(select(Perfume.id)).all()
+        
+        answers = synthetic_answers(WRITERS * REQUESTS_PER_WRITER, seed=50)
+        barrier = threading.Barrier(WRITERS)
+        failures = []
+        
+        def writer(number):
+            barrier.wait()
+            for answer in answers[number::WRITERS]:
+                session = Session()
+                try:
+                    # Same shape as /test/calculate: read the user, then write
+                    # the user, test result, profile and a full result set
+                    user = session.query(User).filter(User.session_id == answer["session_id"]).first()
+                    user = user or User(session_id=answer["session_id"])
+                    test_result = models.TestResult(user=user, answers=answer)
+                    profile = models.OlfactoryProfile(test_result=test_result, **TestEngine.build_profile(answer))
+                    session.add_all([user, test_result, profile])
+                    ResultStore.save_rows(session, profile, [(perfume_id, 50.0) for perfume_id in perfume_ids], {})
+                    session.commit()
+                except Exception as e:
+                    failures.append(repr(e))
+                finally:
+                    session.close()
+        
+        threads = [threading.Thread(target=writer, args=(number,)) for number in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert failures == []
+        assert [error for error in lock_errors if "locked" in error] == []
+        with Session() as session:
+            assert session.query(AffinityResult).count() == WRITERS * REQUESTS_PER_WRITER * PERFUMES
+    finally:
+        engine.dispose()
@@ -0,0 +1,76 @@
+"""
+Script para actualizar en bloque atributos del catálogo (género, estación,
+concentración).
+
+Lee un archivo CSV o JSONL con columnas name, brand (opcional) y los atributos
+a cambiar, los carga en una tabla temporal y aplica un único UPDATE por
+atributo. Un registro sin marca se aplica a todos los perfumes con ese nombre.
+
+Uso:
+    python update_attributes.py --file clasificacion.csv
+    python update_attributes.py --file cambios.jsonl --attributes season concentration
+"""
+
+import argparse
+
+from app.database import SessionLocal
+
+# Import ALL models to ensure they are registered with Base
+from app.models.user import User
+from app.models.test_result import TestResult, OlfactoryProfile
+from app.models.perfume import Perfume, PerfumeVector, AffinityResult
+from app.services.attribute_updater import AttributeUpdater
+from app.services.catalog_ingest import CatalogIngestor
+
+
+def update_attributes(records, attributes=None):
+    """Aplica las actualizaciones y muestra el resumen"""
+    db = SessionLocal()
+    
+    try:
+        print("🔄 Actualizando atributos del catálogo...")
+        stats = AttributeUpdater.apply(db, records, attributes)
+        
+        for number, error in stats["errors"]:
+            print(f"⚠️  Registro {number} inválido: {error}")
+        for name in stats["unmatched_names"]:
+            print(f"⚠️  No encontrado: '{name}'")
+        
+        print(f"\n🎉 {stats['staged']} registros aplicados en {stats['seconds']:.2f}s.")
+        for attribute, changed in stats["changed"].items():
+            print(f"✅ {attribute}: {changed} perfumes cambiados")
+        if stats["unmatched"]:
+            print(f"⚠️  {stats['unmatched']} registros sin perfume")
+        if stats["invalid"]:
+            print(f"⚠️  {stats['invalid']} registros inválidos omitidos")
+        
+        print(f"\n📊 Resumen:")
+        for attribute, counts in stats["summary"].items():
+            print(f"   {attribute}:")
+            for value, count in counts.items():
+                print(f"      {value or '-'}: {count}")
+    
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza atributos del catálogo en bloque")
+    parser.add_argument("--file", required=True, help="Archivo .csv o .jsonl con name, brand y atributos")
+    parser.add_argument(
+        "--attributes",
+        nargs="+",
+        choices=list(AttributeUpdater.ATTRIBUTES),
+        default=None,
+        help="Atributos a aplicar (por defecto todos los presentes)"
+    )
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print("   ACTUALIZACIÓN DE ATRIBUTOS")
+    print("=" * 50)
+    update_attributes(CatalogIngestor.read_records(args.file), args.attributes)
@@ -2,8 +2,7 @@
 Script para actualizar el género de los perfumes existentes.
 """
 
-from sqlalchemy import text
-from app.database import SessionLocal, engine
+from update_attributes import update_attributes
 
 # Clasificación de géneros por perfume
 GENDER_CLASSIFICATION = {
@@ -43,45 +42,11 @@ GENDER_CLASSIFICATION = {
 }
 
 def update_genders():
-    """Actualiza el género de los perfumes existentes usando SQL directo"""
-    
-    with engine.connect() as conn:
-        print("🔄 Actualizando géneros de perfumes...")
-        
-        # Agregar columna si no existe
-        try:
-            conn.execute(text("ALTER TABLE perfumes ADD COLUMN gender VARCHAR(20) DEFAULT 'unisex'"))
-            conn.commit()
-            print("✅ Columna 'gender' agregada")
-        except Exception as e:
-            print(f"ℹ️  Columna ya existe: {str(e)[:50]}")
-        
-        updated_count = 0
-        
-        for name, gender in GENDER_CLASSIFICATION.items():
-            result = conn.execute(
-                text("UPDATE perfumes SET gender = :gender WHERE name = :name"),
-                {"gender": gender, "name": name}
-            )
-            
-            if result.rowcount > 0:
-                updated_count += 1
-                print(f"✅ '{name}' → {gender}")
-            else:
-                print(f"⚠️  No encontrado: '{name}'")
-        
-        conn.commit()
-        print(f"\n🎉 {updated_count} perfumes actualizados con género.")
-        
-        # Mostrar resumen
-        male = conn.execute(text("SELECT COUNT(*) FROM perfumes WHERE gender = 'male'")).scalar()
-        female = conn.execute(text("SELECT COUNT(*) FROM perfumes WHERE gender = 'female'")).scalar()
-        unisex = conn.execute(text("SELECT COUNT(*) FROM perfumes WHERE gender = 'unisex'")).scalar()
-        
-        print(f"\n📊 Resumen:")
-        print(f"   Masculinos: {male}")
-        print(f"   Femeninos: {female}")
-        print(f"   Unisex: {unisex}")
+    """Actualiza el género de los perfumes existentes con un único UPDATE"""
+    update_attributes(
+        ({"name": name, "gender": gender} for name, gender in GENDER_CLASSIFICATION.items()),
+        ["gender"]
+    )
 
 
 if __name__ == "__main__":